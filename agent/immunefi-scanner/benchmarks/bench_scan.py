@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import resource
+import statistics
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from mock_server import MockServer
+from traffic import TrafficIndex, load_corpus
+from pool_state import B58_ALPHABET, DISCRIMINATOR_LEN, OBSERVATION_NUM, OBSERVATION_STATE_LEN, POOL_STATE_LEN, b58encode
+from mint_extensions import TOKEN_PROGRAM_ID
+from scanner import MULTIPLE_ACCOUNTS_LIMIT, VulnerabilityScanner
+
+DEFAULT_TARGETS = [1, 1000, 10000]
+DEFAULT_POOLS = [100, 1000]
+POOL_STAGES = ("discover", "poll", "mints", "price_graph")
+
+def synthetic_corpus() -> List[Dict[str, Any]]:
+    # Minimal stand-in used when no recorded corpus is given, shaped like real mainnet replies
+    account = {
+        "context": {"slot": 1},
+        "value": {
+            "data": [base64.b64encode(b"\0" * 637).decode(), "base64"],
+            "executable": True,
+            "lamports": 1141440,
+            "owner": "BPFLoaderUpgradeab1e11111111111111111111111",
+            "rentEpoch": 0
+        }
+    }
+    return [
+        {
+            "method": "POST",
+            "path": "/",
+            "body": {"jsonrpc": "2.0", "method": "getAccountInfo", "params": []},
+            "status": 200,
+            "response": {"jsonrpc": "2.0", "result": account},
+            "latency": 0.08
+        },
+        {
+            "method": "GET",
+            "path": "/api/v1/bounties",
+            "body": None,
+            "status": 200,
+            "response": {"bounties": []},
+            "latency": 0.25
+        }
+    ]
+
+def synthetic_key(label: str) -> bytes:
+    return hashlib.sha256(label.encode()).digest()
+
+def b58decode(value: str) -> bytes:
+    number = 0
+    for char in value:
+        number = number * 58 + B58_ALPHABET.index(char)
+    return number.to_bytes(32, "big")
+
+def rpc_exchange(method: str, params: List[Any], result: Any) -> Dict[str, Any]:
+    return {
+        "method": "POST",
+        "path": "/",
+        "body": {"jsonrpc": "2.0", "method": method, "params": params},
+        "status": 200,
+        "response": {"jsonrpc": "2.0", "result": result},
+        "latency": 0.05
+    }
+
+def account_value(data: bytes, owner: str = TOKEN_PROGRAM_ID) -> Dict[str, Any]:
+    return {"data": [base64.b64encode(data).decode(), "base64"], "executable": False,
+            "lamports": 2039280, "owner": owner, "rentEpoch": 0}
+
+def synthetic_pool_corpus(pool_count: int, program_id: str) -> List[Dict[str, Any]]:
+    # A cp-swap deployment with consistent prices over a shared set of mints. Account
+    # replies are keyed exactly as the scanner requests them: pools in discovery order,
+    # each followed by its vaults and oracle, then every distinct mint in first-seen order.
+    mint_count = max(2, pool_count // 4)
+    mints = [synthetic_key(f"mint-{i}") for i in range(mint_count)]
+    token_program = b58decode(TOKEN_PROGRAM_ID)
+    accounts: Dict[str, bytes] = {}
+    pool_ids: List[str] = []
+    for i in range(pool_count):
+        a, b = i % mint_count, (i * 7 + 1) % mint_count
+        if a == b:
+            b = (b + 1) % mint_count
+        keys = [synthetic_key(f"pool-{i}-{field}") for field in ("config", "creator", "vault0", "vault1", "lp", "observation")]
+        data = bytearray(POOL_STATE_LEN)
+        struct.pack_into(
+            "<" + "32s" * 10 + "B" * 5 + "Q" * 7, data, DISCRIMINATOR_LEN,
+            keys[0], keys[1], keys[2], keys[3], keys[4], mints[a], mints[b], token_program, token_program, keys[5],
+            255, 0, 9, 6, 6, 10 ** 9, 0, 0, 0, 0, 0, 1
+        )
+        pool_id = b58encode(synthetic_key(f"pool-{i}"))
+        pool_ids.append(pool_id)
+        accounts[pool_id] = bytes(data)
+        # Mint k is worth k + 1 quote units, so every path through the graph agrees
+        reserve_0 = 10 ** 9 * (b + 1)
+        reserve_1 = 10 ** 9 * (a + 1)
+        for key, amount in ((keys[2], reserve_0), (keys[3], reserve_1)):
+            vault = bytearray(165)
+            struct.pack_into("<Q", vault, 64, amount)
+            accounts[b58encode(key)] = bytes(vault)
+        oracle = bytearray(OBSERVATION_STATE_LEN)
+        struct.pack_into("<?H32s", oracle, DISCRIMINATOR_LEN, True, OBSERVATION_NUM - 1, synthetic_key(f"pool-{i}"))
+        for slot in range(OBSERVATION_NUM):
+            struct.pack_into("<QQQQQ", oracle, DISCRIMINATOR_LEN + 35 + slot * 40,
+                             1_700_000_000 + slot * 15, slot * 15 << 32, 0, slot * 15 << 32, 0)
+        accounts[b58encode(keys[5])] = bytes(oracle)
+    for mint in mints:
+        accounts[b58encode(mint)] = struct.pack("<I32sQB?I32s", 1, mint, 10 ** 15, 6, True, 0, bytes(32))
+
+    def fetches(addresses: List[str]) -> List[Dict[str, Any]]:
+        return [
+            rpc_exchange("getMultipleAccounts", [chunk, {"encoding": "base64"}],
+                         {"context": {"slot": 1}, "value": [account_value(accounts[a]) for a in chunk]})
+            for chunk in (addresses[i:i + MULTIPLE_ACCOUNTS_LIMIT] for i in range(0, len(addresses), MULTIPLE_ACCOUNTS_LIMIT))
+        ]
+
+    pool_data = [accounts[pool_id] for pool_id in pool_ids]
+    polled = []
+    seen_mints: Dict[str, None] = {}
+    for pool_id, data in zip(pool_ids, pool_data):
+        fields = struct.unpack_from("<" + "32s" * 10, data, DISCRIMINATOR_LEN)
+        polled.extend([pool_id, b58encode(fields[2]), b58encode(fields[3]), b58encode(fields[9])])
+        seen_mints.setdefault(b58encode(fields[5]))
+        seen_mints.setdefault(b58encode(fields[6]))
+    discovery = rpc_exchange(
+        "getProgramAccounts",
+        [program_id, {"encoding": "base64", "filters": [{"dataSize": POOL_STATE_LEN}]}],
+        [{"pubkey": pool_id, "account": account_value(data, program_id)} for pool_id, data in zip(pool_ids, pool_data)]
+    )
+    return [discovery, *fetches(polled), *fetches(list(seen_mints))]
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def instrument_checks(scanner: VulnerabilityScanner, latencies: List[float]):
+    for name in dir(scanner):
+        if not name.startswith("_check_"):
+            continue
+        check = getattr(scanner, name)
+
+        async def timed(contract_address, _check=check):
+            started = time.perf_counter()
+            try:
+                return await _check(contract_address)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        setattr(scanner, name, timed)
+
+async def run_cycle(scanner: VulnerabilityScanner, targets: List[str], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scan(target: str):
+        async with semaphore:
+            return await scanner.scan_smart_contract(target)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(scan(t) for t in targets))
+    await scanner.scan_immunefi_bounties()
+    return time.perf_counter() - started
+
+async def bench(target_count: int, server: MockServer, base_url: str, concurrency: int) -> Dict[str, Any]:
+    os.environ["SOLANA_RPC_URL"] = f"{base_url}/"
+    os.environ["IMMUNEFI_API_URL"] = f"{base_url}/api/v1/bounties"
+    # Benchmark runs must not restore or overwrite a real scanner's snapshot
+    os.environ["SNAPSHOT_INTERVAL"] = "0"
+    targets = [f"Target{i:040d}"[:44] for i in range(target_count)]
+    latencies: List[float] = []
+    requests_before = server.requests
+
+    scanner = VulnerabilityScanner(scan_interval=0)
+    async with scanner:
+        instrument_checks(scanner, latencies)
+        cycle_time = await run_cycle(scanner, targets, concurrency)
+
+    return {
+        "targets": target_count,
+        "cycle_time_s": round(cycle_time, 4),
+        "accounts_per_s": round(target_count / cycle_time, 1),
+        "rpc_requests": server.requests - requests_before,
+        "check_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "check_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "check_mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+async def bench_pools(server: MockServer, base_url: str, label: Any) -> Dict[str, Any]:
+    # One pass of the pool pipeline, stage by stage, as continuous_scan runs it
+    os.environ["SOLANA_RPC_URL"] = f"{base_url}/"
+    os.environ["SNAPSHOT_INTERVAL"] = "0"
+    os.environ["ADAPTIVE_POLLING"] = "false"
+    os.environ.pop("CP_SWAP_POOLS", None)
+    timings: Dict[str, float] = {}
+    requests: Dict[str, int] = {}
+
+    scanner = VulnerabilityScanner(scan_interval=0)
+    with tempfile.TemporaryDirectory() as archive_root:
+        scanner.observation_archive.root = Path(archive_root)
+        async with scanner:
+            async def stage(name, run):
+                requests_before = server.requests
+                started = time.perf_counter()
+                result = run()
+                if asyncio.iscoroutine(result):
+                    result = await result
+                timings[name] = time.perf_counter() - started
+                requests[name] = server.requests - requests_before
+                return result
+
+            pools = await stage("discover", scanner.discover_pools)
+            await stage("poll", lambda: scanner.poll_pools(list(pools)))
+            await stage("mints", lambda: scanner.scan_pool_mints(pools))
+            await stage("price_graph", scanner.scan_price_graph)
+
+    result: Dict[str, Any] = {"pools": label, "discovered": len(pools)}
+    for name in POOL_STAGES:
+        result[f"{name}_s"] = round(timings[name], 4)
+        result[f"{name}_rpc"] = requests[name]
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return result
+
+def compare(
+    results: List[Dict[str, Any]],
+    pool_results: List[Dict[str, Any]],
+    baseline_path: Path,
+    tolerance: float
+) -> List[str]:
+    saved = json.loads(baseline_path.read_text())
+    regressions = []
+    checks = (
+        ("targets", results, saved.get("results", []), ("cycle_time_s", "check_p99_ms", "peak_rss_mb")),
+        ("pools", pool_results, saved.get("pool_results", []), tuple(f"{name}_s" for name in POOL_STAGES)),
+    )
+    for key, current, previous_runs, metrics in checks:
+        baseline = {r[key]: r for r in previous_runs}
+        for result in current:
+            previous = baseline.get(result[key])
+            if not previous:
+                continue
+            for metric in metrics:
+                if previous.get(metric) and result[metric] > previous[metric] * (1 + tolerance):
+                    regressions.append(
+                        f"{result[key]} {key}: {metric} {previous[metric]} -> {result[metric]}"
+                    )
+    return regressions
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scan pipeline against replayed traffic")
+    parser.add_argument("--corpus", type=Path, help="Recorded corpus (TRAFFIC_RECORD output); synthetic if omitted")
+    parser.add_argument("--targets", type=int, nargs="+", default=DEFAULT_TARGETS)
+    parser.add_argument("--pools", type=int, nargs="*", default=DEFAULT_POOLS,
+                        help="Synthetic pool counts for the pool pipeline; a corpus replays its own pools")
+    parser.add_argument("--speed", type=float, default=0.0, help="Replay latency scale, 0 disables recorded latency")
+    parser.add_argument("--latency", type=float, default=0.0, help="Extra injected latency per request in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Fail if results regress against a previous --output")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.corpus:
+        exchanges = list(load_corpus(args.corpus))
+    else:
+        exchanges = synthetic_corpus()
+
+    server = MockServer(TrafficIndex(exchanges), args.speed, args.latency, args.error_rate, seed=0)
+    base_url = await server.start()
+    results = []
+    try:
+        # Ascending sizes so the process-wide peak RSS is attributable to the largest run so far
+        for target_count in sorted(args.targets):
+            result = await bench(target_count, server, base_url, args.concurrency)
+            results.append(result)
+            print(
+                f"{result['targets']:>6} targets  cycle {result['cycle_time_s']:>8.3f}s  "
+                f"{result['accounts_per_s']:>9.1f} accounts/s  "
+                f"p50 {result['check_p50_ms']:>8.3f}ms  p99 {result['check_p99_ms']:>8.3f}ms  "
+                f"rss {result['peak_rss_mb']:>7.1f}MB"
+            )
+        pool_results = []
+        if args.corpus:
+            pool_results.append(await bench_pools(server, base_url, "corpus"))
+        else:
+            program_id = VulnerabilityScanner().program_id
+            for pool_count in sorted(args.pools):
+                pool_server = MockServer(
+                    TrafficIndex(synthetic_pool_corpus(pool_count, program_id)),
+                    args.speed, args.latency, args.error_rate, seed=0
+                )
+                pool_url = await pool_server.start()
+                try:
+                    pool_results.append(await bench_pools(pool_server, pool_url, pool_count))
+                finally:
+                    await pool_server.stop()
+        for result in pool_results:
+            stages = "  ".join(f"{name} {result[f'{name}_s']:>7.3f}s/{result[f'{name}_rpc']}rpc" for name in POOL_STAGES)
+            print(f"{result['pools']:>6} pools  discovered {result['discovered']:>6}  {stages}")
+    finally:
+        await server.stop()
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "corpus": str(args.corpus) if args.corpus else "synthetic",
+            "results": results,
+            "pool_results": pool_results
+        }, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, pool_results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -56,6 +56,13 @@ CREATE TABLE scanner_status (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Worker leases for sharding scan targets across replicas
+CREATE TABLE scanner_workers (
+    worker_id TEXT PRIMARY KEY,
+    last_heartbeat DOUBLE PRECISION NOT NULL,
+    lease_expires DOUBLE PRECISION NOT NULL
+);
+
 -- Insert initial scanner status
 INSERT INTO scanner_status (id, is_active) VALUES (1, TRUE);
 
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+import heapq
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PoolActivity:
+    pool_id: str
+    interval: float
+    next_due: float
+    activity: float = 0.0
+    fingerprint: Optional[Tuple] = None
+    last_signature: Optional[str] = None
+    polls: int = 0
+    changes: int = 0
+
+class RpcBudget:
+    # Token bucket shared by every RPC request the scanner sends. Requests are charged as
+    # they go out and may drive the balance negative; only polling, the one load that can
+    # wait, holds back until the balance recovers. A rate of 0 disables the limit.
+    def __init__(self, rate: float = 2.0, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate * 2, 1.0)
+        self.spent = 0.0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def balance(self, now: Optional[float] = None) -> float:
+        if self.rate <= 0:
+            return math.inf
+        now = time.monotonic() if now is None else now
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+        return self._tokens
+
+    def charge(self, cost: float = 1.0, now: Optional[float] = None):
+        self.balance(now)
+        self._tokens -= cost
+        self.spent += cost
+
+class AdaptiveScheduler:
+    # Per-pool intervals shrink quickly when a poll sees a change and grow slowly while a
+    # pool stays idle. Due pools are released only as far as the shared RpcBudget covers
+    # the batch, and when the intervals ask for more than the budget rate, every interval
+    # is stretched by the same factor.
+    def __init__(
+        self,
+        rpc_budget: float = 2.0,
+        min_interval: float = 5.0,
+        max_interval: float = 1200.0,
+        initial_interval: float = 300.0,
+        poll_cost: float = 1.0,
+        speedup: float = 4.0,
+        backoff: float = 1.5,
+        decay: float = 0.8,
+        budget: Optional[RpcBudget] = None,
+        tick: float = 1.0
+    ):
+        self.budget = budget or RpcBudget(rpc_budget)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = min(initial_interval, max_interval)
+        # Requests per polled pool; a batch costs this times its size, rounded up
+        self.poll_cost = poll_cost
+        self.speedup = speedup
+        self.backoff = backoff
+        self.decay = decay
+        self.tick = tick
+        self.pools: Dict[str, PoolActivity] = {}
+        self._heap: List[Tuple[float, str]] = []
+        # Polls per second the current intervals ask for
+        self._demand = 0.0
+
+    def track(self, pool_ids: Iterable[str], now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        wanted = set(pool_ids)
+        for pool_id in list(self.pools):
+            if pool_id not in wanted:
+                self._demand -= 1.0 / self.pools.pop(pool_id).interval
+        for index, pool_id in enumerate(sorted(wanted - set(self.pools))):
+            # Spread first polls so newly tracked pools do not all land on the same tick
+            first_due = now + (index % max(int(self.initial_interval), 1))
+            self.pools[pool_id] = PoolActivity(pool_id, self.initial_interval, first_due)
+            self._demand += 1.0 / self.initial_interval
+            heapq.heappush(self._heap, (first_due, pool_id))
+
+    def batch_cost(self, pools: int) -> int:
+        return math.ceil(pools * self.poll_cost - 1e-9) if pools else 0
+
+    def projected_rps(self) -> float:
+        # Polls are batched once per tick, and every non-empty batch is at least one request
+        return max(self._demand * self.poll_cost, min(self._demand, 1.0 / self.tick))
+
+    def budget_scale(self) -> float:
+        rate = self.budget.rate
+        return max(1.0, self.projected_rps() / rate) if rate > 0 else 1.0
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        # Releases only what the budget covers; the requests themselves are charged by
+        # the caller as they are sent
+        now = time.monotonic() if now is None else now
+        available = self.budget.balance(now)
+
+        selected = []
+        while self._heap and self._heap[0][0] <= now and self.batch_cost(len(selected) + 1) <= available:
+            due_at, pool_id = heapq.heappop(self._heap)
+            pool = self.pools.get(pool_id)
+            if pool is None or pool.next_due != due_at:
+                continue
+            selected.append(pool_id)
+        return selected
+
+    def requeue(self, pool_ids: Iterable[str], now: Optional[float] = None):
+        # Observed pools already have a future next_due; the rest keep their interval
+        now = time.monotonic() if now is None else now
+        for pool_id in pool_ids:
+            pool = self.pools.get(pool_id)
+            if pool is None or pool.next_due > now:
+                continue
+            pool.next_due = now + min(self.max_interval, pool.interval * self.budget_scale())
+            heapq.heappush(self._heap, (pool.next_due, pool_id))
+
+    def observe(self, pool_id: str, changed: bool, now: Optional[float] = None):
+        pool = self.pools.get(pool_id)
+        if pool is None:
+            return
+        now = time.monotonic() if now is None else now
+        pool.polls += 1
+        self._demand -= 1.0 / pool.interval
+        pool.activity = pool.activity * self.decay + (1.0 - self.decay) * (1.0 if changed else 0.0)
+        if changed:
+            pool.changes += 1
+            pool.interval = max(self.min_interval, pool.interval / self.speedup)
+        else:
+            pool.interval = min(self.max_interval, pool.interval * self.backoff)
+        self._demand += 1.0 / pool.interval
+        pool.next_due = now + min(self.max_interval, pool.interval * self.budget_scale())
+        heapq.heappush(self._heap, (pool.next_due, pool_id))
+
+    def to_snapshot(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        # next_due is monotonic, so it is stored as time remaining
+        now = time.monotonic() if now is None else now
+        return [
+            {
+                "pool_id": p.pool_id,
+                "interval": p.interval,
+                "due_in": max(0.0, p.next_due - now),
+                "activity": p.activity,
+                "fingerprint": p.fingerprint,
+                "last_signature": p.last_signature,
+                "polls": p.polls,
+                "changes": p.changes
+            }
+            for p in self.pools.values()
+        ]
+
+    @staticmethod
+    def activities_from_snapshot(entries: List[Dict[str, Any]], now: Optional[float] = None) -> List[PoolActivity]:
+        now = time.monotonic() if now is None else now
+        activities = []
+        for entry in entries:
+            fingerprint = entry.get("fingerprint")
+            if fingerprint is not None:
+                epoch, vaults, observation_index = fingerprint
+                fingerprint = (epoch, tuple(vaults) if vaults is not None else None, observation_index)
+            activities.append(PoolActivity(
+                pool_id=entry["pool_id"],
+                interval=float(entry["interval"]),
+                next_due=now + float(entry["due_in"]),
+                activity=float(entry["activity"]),
+                fingerprint=fingerprint,
+                last_signature=entry.get("last_signature"),
+                polls=int(entry["polls"]),
+                changes=int(entry["changes"])
+            ))
+        return activities
+
+    def load(self, activities: List[PoolActivity]):
+        # Restored pools keep their learned cadence instead of all coming due at once
+        for activity in activities:
+            previous = self.pools.get(activity.pool_id)
+            if previous:
+                self._demand -= 1.0 / previous.interval
+            activity.interval = min(self.max_interval, max(self.min_interval, activity.interval))
+            self.pools[activity.pool_id] = activity
+            self._demand += 1.0 / activity.interval
+            heapq.heappush(self._heap, (activity.next_due, activity.pool_id))
+
+    def stats(self) -> Dict[str, float]:
+        intervals = sorted(p.interval for p in self.pools.values())
+        return {
+            "tracked_pools": len(intervals),
+            "hot_pools": sum(1 for i in intervals if i <= self.min_interval * self.speedup),
+            "median_interval": intervals[len(intervals) // 2] if intervals else 0.0,
+            "budget_scale": round(self.budget_scale(), 3),
+            "projected_rps": round(self.projected_rps() / self.budget_scale(), 3),
+            "rpc_requests": int(self.budget.spent)
+        }
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import logging
+import os
+import smtplib
+import time
+from datetime import datetime
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+class WebhookSink:
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def send(self, digest: Dict[str, Any]):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(timeout=self.timeout)
+        async with self.session.post(self.url, json=digest) as response:
+            if response.status >= 400:
+                raise RuntimeError(f"Webhook returned HTTP {response.status}")
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+
+class FileSink:
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def _append(self, line: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
+
+    async def send(self, digest: Dict[str, Any]):
+        await asyncio.to_thread(self._append, json.dumps(digest, default=str))
+
+    async def close(self):
+        pass
+
+class EmailSink:
+    name = "email"
+
+    def __init__(self, host: str, port: int, sender: str, recipients: List[str],
+                 username: Optional[str] = None, password: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+
+    def _deliver(self, digest: Dict[str, Any]):
+        message = EmailMessage()
+        message["Subject"] = f"[Immunefi Scanner] {digest['count']} critical finding(s) on {digest['target']}"
+        message["From"] = self.sender
+        message["To"] = ", ".join(self.recipients)
+        message.set_content("\n\n".join(
+            f"{f['title']}\n{f['description']}\nBounty: ${f['bounty_min']:,} - ${f['bounty_max']:,}"
+            for f in digest["findings"]
+        ))
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            if self.username:
+                smtp.starttls()
+                smtp.login(self.username, self.password or "")
+            smtp.send_message(message)
+
+    async def send(self, digest: Dict[str, Any]):
+        await asyncio.to_thread(self._deliver, digest)
+
+    async def close(self):
+        pass
+
+class RateLimiter:
+    def __init__(self, per_minute: int):
+        self.capacity = max(per_minute, 1)
+        self.tokens = float(self.capacity)
+        self.refill_rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.refill_rate)
+
+class AlertDispatcher:
+    def __init__(
+        self,
+        sinks: List[Any],
+        window: float = 60.0,
+        realert_after: float = 86400.0,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        rate_limit_per_minute: int = 30,
+        queue_size: int = 10000
+    ):
+        self.sinks = sinks
+        self.window = window
+        self.realert_after = realert_after
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.limiters = {sink.name: RateLimiter(rate_limit_per_minute) for sink in sinks}
+        self.sent: Dict[str, float] = {}
+        self.pending: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.in_flight: set = set()
+        self.delivered = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+        self._deliveries: set = set()
+
+    @classmethod
+    def from_env(cls) -> Optional["AlertDispatcher"]:
+        sinks: List[Any] = []
+        if os.getenv("ALERT_WEBHOOK_URL"):
+            sinks.append(WebhookSink(os.environ["ALERT_WEBHOOK_URL"]))
+        if os.getenv("ALERT_FILE"):
+            sinks.append(FileSink(os.environ["ALERT_FILE"]))
+        if os.getenv("ALERT_EMAIL_TO") and os.getenv("SMTP_HOST"):
+            sinks.append(EmailSink(
+                os.environ["SMTP_HOST"],
+                int(os.getenv("SMTP_PORT", "587")),
+                os.getenv("ALERT_EMAIL_FROM", "scanner@localhost"),
+                [r.strip() for r in os.environ["ALERT_EMAIL_TO"].split(",") if r.strip()],
+                os.getenv("SMTP_USERNAME"),
+                os.getenv("SMTP_PASSWORD")
+            ))
+        if not sinks:
+            return None
+        return cls(
+            sinks,
+            window=float(os.getenv("ALERT_WINDOW", "60")),
+            realert_after=float(os.getenv("ALERT_REALERT_AFTER", "86400")),
+            rate_limit_per_minute=int(os.getenv("ALERT_RATE_LIMIT", "30"))
+        )
+
+    def submit(self, findings: List[Dict[str, Any]]):
+        # Called from the scan loop: enqueue and return, never wait on a sink
+        for finding in findings:
+            try:
+                self.queue.put_nowait(finding)
+            except asyncio.QueueFull:
+                logger.error("Alert queue full, dropping finding", extra={"title": finding.get("title")})
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._drain()
+        await self._flush()
+        if self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+        for sink in self.sinks:
+            await sink.close()
+
+    def _fingerprint(self, finding: Dict[str, Any]) -> str:
+        # Finding ids are time based; the same issue on the same target is one alert
+        return f"{finding.get('contract_address')}:{finding.get('title')}"
+
+    def _drain(self):
+        while True:
+            try:
+                finding = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            fingerprint = self._fingerprint(finding)
+            sent_at = self.sent.get(fingerprint)
+            if fingerprint in self.in_flight or (sent_at and time.time() - sent_at < self.realert_after):
+                continue
+            target = finding.get("contract_address") or "immunefi"
+            self.pending.setdefault(target, {})[fingerprint] = finding
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.window)
+            self._drain()
+            await self._flush()
+
+    async def _flush(self):
+        pending, self.pending = self.pending, {}
+        now = time.time()
+        for target, findings in pending.items():
+            digest = {
+                "target": target,
+                "count": len(findings),
+                "generated_at": datetime.now().isoformat(),
+                "total_bounty_max": sum(f.get("bounty_max", 0) for f in findings.values()),
+                "findings": list(findings.values())
+            }
+            self.in_flight.update(findings)
+            task = asyncio.create_task(self._dispatch(target, findings, digest))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+        expired = [key for key, sent_at in self.sent.items() if now - sent_at >= self.realert_after]
+        for key in expired:
+            del self.sent[key]
+
+    async def _dispatch(self, target: str, findings: Dict[str, Dict[str, Any]], digest: Dict[str, Any]):
+        # A finding only counts as alerted once some sink took it; if every sink gave up it
+        # goes back into pending for the next window instead of being deduped for a day
+        try:
+            results = await asyncio.gather(*(self._deliver(sink, digest) for sink in self.sinks))
+        finally:
+            self.in_flight.difference_update(findings)
+        if any(results):
+            now = time.time()
+            for fingerprint in findings:
+                self.sent[fingerprint] = now
+            return
+        retry = self.pending.setdefault(target, {})
+        for fingerprint, finding in findings.items():
+            retry.setdefault(fingerprint, finding)
+
+    async def _deliver(self, sink: Any, digest: Dict[str, Any]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            await self.limiters[sink.name].acquire()
+            try:
+                await sink.send(digest)
+                self.delivered += 1
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    logger.error(f"Alert delivery to {sink.name} failed: {e}", extra={"target": digest["target"]})
+                    return False
+                await asyncio.sleep(min(self.retry_delay * 2 ** attempt, 30))
@@ -1,16 +1,31 @@
 #!/usr/bin/env python3
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Dict, Any
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse, Response
+from typing import List, Optional, Dict, Any, Union, TYPE_CHECKING
 import asyncio
+import importlib
 import json
+import os
+import sys
+import hmac
+import ipaddress
+import threading
+import time
 import logging
 from pathlib import Path
 from datetime import datetime
-import uvicorn
 
-from scanner import VulnerabilityScanner, SeverityLevel, Vulnerability
+from pydantic import BaseModel
+from scan_jobs import ScanJobQueue, QuotaExceededError
+from logging_setup import configure_logging
+from tracing import sample_profile, collapsed_stacks
+
+# The scanner (and aiohttp, numpy, ... behind it) is imported after the server is up,
+# so probes are answered while it loads and restores its snapshot
+if TYPE_CHECKING:
+    from scanner import VulnerabilityScanner, Vulnerability
 
 logger = logging.getLogger(__name__)
 
@@ -28,25 +43,73 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-scanner_instance: Optional[VulnerabilityScanner] = None
+scanner_instance: Optional["VulnerabilityScanner"] = None
 scanner_task: Optional[asyncio.Task] = None
+scanner_startup: Optional[asyncio.Task] = None
+scan_jobs: Optional[ScanJobQueue] = None
+loop_thread_id: Optional[int] = None
+
+class BatchScanRequest(BaseModel):
+    contract_addresses: List[str]
+    priority: int = 5
+
+class BountyItem(BaseModel):
+    severity: str
+    funds_at_risk: Optional[int] = None
+    contract_address: Optional[str] = None
+
+class BatchBountyRequest(BaseModel):
+    items: List[BountyItem]
+
+MAX_BOUNTY_BATCH = int(os.getenv("MAX_BOUNTY_BATCH", "500"))
+
+async def _scanner_module():
+    # Imported off the loop; once startup has loaded it, handlers get the cached module
+    module = sys.modules.get("scanner")
+    if module is None:
+        module = await asyncio.to_thread(importlib.import_module, "scanner")
+    return module
 
 @app.on_event("startup")
 async def startup_event():
-    global scanner_instance, scanner_task
+    global scanner_startup, scan_jobs, loop_thread_id
+    configure_logging()
+    loop_thread_id = threading.get_ident()
     logger.info("Starting Gorbagana Immunefi Scanner API...")
     
-    scanner_instance = VulnerabilityScanner(scan_interval=300)
-    await scanner_instance.__aenter__()
+    scan_jobs = ScanJobQueue(
+        perform_manual_scan,
+        max_workers=int(os.getenv("MANUAL_SCAN_WORKERS", "4")),
+        client_quota=int(os.getenv("MANUAL_SCAN_CLIENT_QUOTA", "20"))
+    )
+    scan_jobs.start()
+    scanner_startup = asyncio.create_task(start_scanner())
+
+async def start_scanner():
+    global scanner_instance, scanner_task
+    try:
+        scanner_module = await _scanner_module()
+        scanner = scanner_module.VulnerabilityScanner(scan_interval=300)
+        await scanner.__aenter__()
+    except Exception as e:
+        logger.error(f"Error starting scanner: {e}")
+        return
+    scanner_instance = scanner
     
-    scanner_task = asyncio.create_task(scanner_instance.continuous_scan())
+    scanner_task = asyncio.create_task(scanner.continuous_scan())
     logger.info("Background vulnerability scanning started")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    global scanner_instance, scanner_task
+    global scanner_instance, scanner_task, scan_jobs
     logger.info("Shutting down Gorbagana Immunefi Scanner...")
     
+    if scanner_startup and not scanner_startup.done():
+        scanner_startup.cancel()
+    
+    if scan_jobs:
+        await scan_jobs.stop()
+    
     if scanner_instance:
         scanner_instance.stop()
         await scanner_instance.__aexit__(None, None, None)
@@ -83,7 +146,7 @@ async def health_check():
 
 @app.get("/status")
 async def get_scanner_status():
-    global scanner_instance
+    global scanner_instance, scan_jobs
     
     if not scanner_instance:
         raise HTTPException(status_code=503, detail="Scanner not initialized")
@@ -92,7 +155,8 @@ async def get_scanner_status():
         "is_running": scanner_instance.is_running,
         "last_scan": scanner_instance.last_scan,
         "total_vulnerabilities": len(scanner_instance.vulnerabilities),
-        "scan_interval": scanner_instance.scan_interval
+        "scan_interval": scanner_instance.scan_interval,
+        "manual_scans": scan_jobs.stats() if scan_jobs else None
     }
 
 @app.get("/vulnerabilities")
@@ -109,6 +173,7 @@ async def get_vulnerabilities(
     vulnerabilities = scanner_instance.vulnerabilities
     
     if severity:
+        SeverityLevel = (await _scanner_module()).SeverityLevel
         try:
             severity_filter = SeverityLevel(severity.title())
             vulnerabilities = [v for v in vulnerabilities if v.severity == severity_filter]
@@ -126,6 +191,7 @@ async def get_critical_vulnerabilities():
     if not scanner_instance:
         raise HTTPException(status_code=503, detail="Scanner not initialized")
     
+    SeverityLevel = (await _scanner_module()).SeverityLevel
     critical_vulns = [
         v for v in scanner_instance.vulnerabilities 
         if v.severity == SeverityLevel.CRITICAL
@@ -137,43 +203,151 @@ async def get_critical_vulnerabilities():
         "vulnerabilities": [v.to_dict() for v in critical_vulns]
     }
 
+def _trusted_proxies() -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    networks = []
+    for entry in os.getenv("TRUSTED_PROXIES", "").split(","):
+        if entry.strip():
+            networks.append(ipaddress.ip_network(entry.strip(), strict=False))
+    return networks
+
+TRUSTED_PROXIES = _trusted_proxies()
+
+def _client_id(request: Request) -> str:
+    # Quotas key on the connecting address; X-Real-IP is only believed from a configured proxy
+    peer = request.client.host if request.client else None
+    if not peer:
+        return "anonymous"
+    real_ip = request.headers.get("X-Real-IP")
+    if real_ip and TRUSTED_PROXIES:
+        try:
+            address = ipaddress.ip_address(peer)
+        except ValueError:
+            return peer
+        if any(address in network for network in TRUSTED_PROXIES):
+            return real_ip.strip()
+    return peer
+
 @app.post("/scan/manual")
-async def trigger_manual_scan(contract_address: str, background_tasks: BackgroundTasks):
-    global scanner_instance
+async def trigger_manual_scan(contract_address: str, request: Request, priority: int = 5):
+    global scanner_instance, scan_jobs
     
-    if not scanner_instance:
+    if not scanner_instance or not scan_jobs:
         raise HTTPException(status_code=503, detail="Scanner not initialized")
     
-    background_tasks.add_task(perform_manual_scan, contract_address)
+    try:
+        job = scan_jobs.submit(contract_address, _client_id(request), priority)
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     
     return {
         "message": f"Manual scan initiated for contract {contract_address}",
-        "status": "started"
+        "status": job.status.value,
+        "job_id": job.id
     }
 
-async def perform_manual_scan(contract_address: str):
+@app.post("/scan/manual/batch")
+async def trigger_batch_scan(batch: BatchScanRequest, request: Request):
+    global scanner_instance, scan_jobs
+    
+    if not scanner_instance or not scan_jobs:
+        raise HTTPException(status_code=503, detail="Scanner not initialized")
+    
+    client_id = _client_id(request)
+    jobs = []
+    rejected = []
+    for contract_address in dict.fromkeys(batch.contract_addresses):
+        try:
+            job = scan_jobs.submit(contract_address, client_id, batch.priority)
+            jobs.append({"contract_address": contract_address, "job_id": job.id, "status": job.status.value})
+        except QuotaExceededError:
+            rejected.append(contract_address)
+    
+    return {
+        "accepted": len(jobs),
+        "rejected": rejected,
+        "jobs": jobs
+    }
+
+@app.get("/scan/jobs/{job_id}")
+async def get_scan_job(job_id: str):
+    global scan_jobs
+    
+    if not scan_jobs:
+        raise HTTPException(status_code=503, detail="Scanner not initialized")
+    
+    job = scan_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Unknown scan job: {job_id}")
+    
+    return job.to_dict()
+
+async def perform_manual_scan(contract_address: str) -> List["Vulnerability"]:
     global scanner_instance
     
+    logger.info(f"Starting manual scan for contract: {contract_address}")
+    vulnerabilities = await scanner_instance.scan_smart_contract(contract_address)
+    
+    if vulnerabilities:
+        scanner_instance.record_findings(vulnerabilities)
+        await scanner_instance._save_vulnerabilities(vulnerabilities)
+        await scanner_instance._alert_critical_vulnerabilities(vulnerabilities)
+        scanner_instance._publish_updates(vulnerabilities)
+        logger.info(f"Manual scan completed: {len(vulnerabilities)} vulnerabilities found")
+    else:
+        logger.info("Manual scan completed: No vulnerabilities found")
+    
+    return vulnerabilities
+
+@app.websocket("/ws")
+async def live_feed_websocket(websocket: WebSocket):
+    global scanner_instance
+    
+    await websocket.accept()
+    if not scanner_instance:
+        await websocket.close(code=1013)
+        return
+    
+    feed = scanner_instance.live_feed
+    subscriber = feed.subscribe()
     try:
-        logger.info(f"Starting manual scan for contract: {contract_address}")
-        vulnerabilities = await scanner_instance.scan_smart_contract(contract_address)
-        
-        if vulnerabilities:
-            scanner_instance.vulnerabilities.extend(vulnerabilities)
-            await scanner_instance._save_vulnerabilities(vulnerabilities)
-            await scanner_instance._alert_critical_vulnerabilities(vulnerabilities)
-            logger.info(f"Manual scan completed: {len(vulnerabilities)} vulnerabilities found")
-        else:
-            logger.info("Manual scan completed: No vulnerabilities found")
-            
-    except Exception as e:
-        logger.error(f"Error during manual scan: {e}")
+        while True:
+            message = await subscriber.next(timeout=feed.heartbeat_interval)
+            await websocket.send_text(message if message is not None else feed.heartbeat())
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        feed.unsubscribe(subscriber)
+
+@app.get("/events")
+async def live_feed_events(request: Request):
+    global scanner_instance
+    
+    if not scanner_instance:
+        raise HTTPException(status_code=503, detail="Scanner not initialized")
+    
+    feed = scanner_instance.live_feed
+    subscriber = feed.subscribe()
+    
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                message = await subscriber.next(timeout=feed.heartbeat_interval)
+                yield f"data: {message if message is not None else feed.heartbeat()}\n\n"
+        finally:
+            feed.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/bounty-calculator")
 async def calculate_bounty(severity: str, funds_at_risk: Optional[int] = None):
+    scanner = await _scanner_module()
+    SeverityLevel, ImmunefiBountyCalculator = scanner.SeverityLevel, scanner.ImmunefiBountyCalculator
     try:
         severity_level = SeverityLevel(severity.title())
-        from scanner import ImmunefiBountyCalculator
         
         bounty_info = ImmunefiBountyCalculator.calculate_bounty(severity_level, funds_at_risk)
         
@@ -186,34 +360,195 @@ async def calculate_bounty(severity: str, funds_at_risk: Optional[int] = None):
     except ValueError:
         raise HTTPException(status_code=400, detail=f"Invalid severity level: {severity}")
 
+@app.post("/bounty-calculator/batch")
+async def calculate_bounty_batch(batch: BatchBountyRequest):
+    global scanner_instance
+    if len(batch.items) > MAX_BOUNTY_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BOUNTY_BATCH} items per batch")
+    scanner = await _scanner_module()
+    SeverityLevel, ImmunefiBountyCalculator = scanner.SeverityLevel, scanner.ImmunefiBountyCalculator
+    
+    results = []
+    total_min = 0
+    total_max = 0
+    for item in batch.items:
+        try:
+            severity_level = SeverityLevel(item.severity.title())
+        except ValueError:
+            results.append({"severity": item.severity, "error": f"Invalid severity level: {item.severity}"})
+            continue
+        
+        funds_at_risk = item.funds_at_risk
+        source = "provided" if funds_at_risk is not None else None
+        scope = None
+        if funds_at_risk is None and item.contract_address and scanner_instance:
+            funds_at_risk = scanner_instance.estimate_funds_at_risk(item.contract_address)
+            if funds_at_risk is not None:
+                source = "estimated"
+                scope = scanner_instance.funds_at_risk_scope(item.contract_address)
+        
+        bounty_info = ImmunefiBountyCalculator.calculate_bounty(severity_level, funds_at_risk)
+        total_min += bounty_info["min"]
+        total_max += bounty_info["max"]
+        results.append({
+            "severity": severity_level.value,
+            "contract_address": item.contract_address,
+            "bounty_range": bounty_info,
+            "funds_at_risk": funds_at_risk,
+            "funds_at_risk_source": source,
+            "funds_at_risk_scope": scope
+        })
+    
+    return {
+        "results": results,
+        "total_bounty_range": {"min": total_min, "max": total_max},
+        "quote_mint": scanner_instance.valuation.quote_mint if scanner_instance else None
+    }
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+def _conditional_json(request: Request, etag: str, build) -> Response:
+    # Dashboards poll these endpoints; an unchanged version answers 304 without building the body
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(build(), headers=headers)
+
 @app.get("/statistics")
-async def get_statistics():
+async def get_statistics(request: Request):
     global scanner_instance
     
     if not scanner_instance:
         raise HTTPException(status_code=503, detail="Scanner not initialized")
     
-    vulnerabilities = scanner_instance.vulnerabilities
+    scanner = scanner_instance
+    etag = f'W/"stats-{scanner.stats.version}-{scanner.scan_count}-{int(scanner.is_running)}"'
     
-    severity_counts = {}
-    total_bounty_potential = 0
+    def build():
+        return {
+            **scanner.stats.totals(),
+            "last_scan": scanner.last_scan.isoformat() if scanner.last_scan else None,
+            "scanner_uptime": scanner.is_running
+        }
     
-    for severity in SeverityLevel:
-        count = len([v for v in vulnerabilities if v.severity == severity])
-        severity_counts[severity.value] = count
-        
-        if count > 0:
-            bounty_sum = sum(v.bounty_max for v in vulnerabilities if v.severity == severity)
-            total_bounty_potential += bounty_sum
+    return _conditional_json(request, etag, build)
+
+@app.get("/statistics/timeseries")
+async def get_statistics_timeseries(request: Request, resolution: str = "hour", limit: Optional[int] = None):
+    global scanner_instance
+    
+    if not scanner_instance:
+        raise HTTPException(status_code=503, detail="Scanner not initialized")
+    
+    stats = scanner_instance.stats
+    if resolution not in stats.rings:
+        raise HTTPException(status_code=400, detail=f"Invalid resolution: {resolution} (use {', '.join(stats.rings)})")
+    
+    # The window slides when a new bucket starts, so the current bucket is part of the version
+    now = time.time()
+    etag = f'W/"ts-{resolution}-{limit}-{stats.version}-{stats.current_bucket(resolution, now)}"'
+    return _conditional_json(request, etag, lambda: stats.timeseries(resolution, limit, now))
+
+@app.get("/pools/price-outliers")
+async def get_price_outliers():
+    global scanner_instance
+    
+    if not scanner_instance:
+        raise HTTPException(status_code=503, detail="Scanner not initialized")
     
+    graph = scanner_instance.price_graph
+    outliers = sorted(graph.outliers.values(), key=lambda o: -o.deviation)
     return {
-        "total_vulnerabilities": len(vulnerabilities),
-        "severity_breakdown": severity_counts,
-        "total_bounty_potential": total_bounty_potential,
-        "last_scan": scanner_instance.last_scan,
-        "scanner_uptime": scanner_instance.is_running
+        "mints": len(graph.mints),
+        "pools": len(graph.pool_slot),
+        "count": len(outliers),
+        "outliers": [o.to_dict() for o in outliers]
+    }
+
+@app.get("/pools/{pool_id}/observations")
+async def get_pool_observations(
+    pool_id: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: int = Query(1000, ge=1, le=10000)
+):
+    global scanner_instance
+    
+    if not scanner_instance:
+        raise HTTPException(status_code=503, detail="Scanner not initialized")
+    
+    series = await asyncio.to_thread(scanner_instance.observation_archive.twap_series, pool_id, start, end)
+    timestamps = series["block_timestamp"][-limit:]
+    token_0 = series["token_0_price"][-limit:]
+    token_1 = series["token_1_price"][-limit:]
+    
+    return {
+        "pool_id": pool_id,
+        "count": len(timestamps),
+        "first_timestamp": int(timestamps[0]) if len(timestamps) else None,
+        "last_timestamp": int(timestamps[-1]) if len(timestamps) else None,
+        "observations": [
+            {
+                "block_timestamp": int(ts),
+                "token_0_price": float(p0),
+                "token_1_price": float(p1)
+            }
+            for ts, p0, p1 in zip(timestamps, token_0, token_1)
+        ]
     }
 
+@app.get("/pools/{pool_id}/twap")
+async def get_pool_twap(pool_id: str, start: Optional[int] = None, end: Optional[int] = None):
+    global scanner_instance
+    
+    if not scanner_instance:
+        raise HTTPException(status_code=503, detail="Scanner not initialized")
+    
+    twap = await asyncio.to_thread(scanner_instance.observation_archive.twap, pool_id, start, end)
+    if twap is None:
+        raise HTTPException(status_code=404, detail=f"Not enough archived observations for pool {pool_id}")
+    
+    return {"pool_id": pool_id, **twap}
+
+def _require_debug_token(request: Request):
+    expected = os.getenv("DEBUG_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Debug endpoints are disabled")
+    provided = request.headers.get("X-Debug-Token", "")
+    if not hmac.compare_digest(provided, expected):
+        raise HTTPException(status_code=401, detail="Invalid debug token")
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(
+    request: Request,
+    seconds: float = Query(10.0, gt=0, le=120),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    all_threads: bool = False
+):
+    _require_debug_token(request)
+    
+    # Sampling runs in a worker thread so the event loop being profiled keeps running
+    stacks = await asyncio.to_thread(
+        sample_profile, seconds, interval_ms / 1000, None if all_threads else loop_thread_id
+    )
+    return collapsed_stacks(stacks)
+
+@app.get("/debug/trace")
+async def debug_trace(request: Request):
+    global scanner_instance
+    _require_debug_token(request)
+    
+    if not scanner_instance:
+        raise HTTPException(status_code=503, detail="Scanner not initialized")
+    if not scanner_instance.tracer.enabled:
+        raise HTTPException(status_code=404, detail="Tracing is disabled, set TRACE_ENABLED=true")
+    
+    return scanner_instance.tracer.chrome_trace()
+
 @app.get("/export")
 async def export_vulnerabilities(format: str = "json"):
     global scanner_instance
@@ -236,6 +571,7 @@ async def export_vulnerabilities(format: str = "json"):
     return {"message": "CSV export functionality coming soon"}
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(
         "api:app",
         host="0.0.0.0",
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from contextlib import closing
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WORKERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scanner_workers (
+    worker_id TEXT PRIMARY KEY,
+    last_heartbeat DOUBLE PRECISION NOT NULL,
+    lease_expires DOUBLE PRECISION NOT NULL
+)
+"""
+
+DISCOVERY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scanner_discovery (
+    id INTEGER PRIMARY KEY,
+    pool_ids TEXT NOT NULL,
+    published_at DOUBLE PRECISION NOT NULL
+)
+"""
+
+# Ring key whose owner runs the full getProgramAccounts discovery for every replica
+DISCOVERY_KEY = "discovery"
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+class HashRing:
+    def __init__(self, members: Iterable[str], vnodes: int = 64):
+        self.members = sorted(set(members))
+        points = sorted((_hash(f"{member}#{i}"), member) for member in self.members for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[index]
+
+class SQLiteCoordinator:
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute(WORKERS_SCHEMA)
+            conn.execute(DISCOVERY_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _heartbeat(self, worker_id: str, ttl: float) -> List[str]:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO scanner_workers (worker_id, last_heartbeat, lease_expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET last_heartbeat = excluded.last_heartbeat, "
+                "lease_expires = excluded.lease_expires",
+                (worker_id, now, now + ttl)
+            )
+            conn.execute("DELETE FROM scanner_workers WHERE lease_expires < ?", (now,))
+            rows = conn.execute("SELECT worker_id FROM scanner_workers WHERE lease_expires >= ?", (now,)).fetchall()
+        return [row[0] for row in rows]
+
+    def _leave(self, worker_id: str):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM scanner_workers WHERE worker_id = ?", (worker_id,))
+
+    def _publish_pools(self, pool_ids: List[str]):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO scanner_discovery (id, pool_ids, published_at) VALUES (1, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET pool_ids = excluded.pool_ids, published_at = excluded.published_at",
+                (json.dumps(pool_ids), time.time())
+            )
+
+    def _shared_pools(self) -> List[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT pool_ids FROM scanner_discovery WHERE id = 1").fetchone()
+        return json.loads(row[0]) if row else []
+
+    async def heartbeat(self, worker_id: str, ttl: float) -> List[str]:
+        return await asyncio.to_thread(self._heartbeat, worker_id, ttl)
+
+    async def leave(self, worker_id: str):
+        await asyncio.to_thread(self._leave, worker_id)
+
+    async def publish_pools(self, pool_ids: List[str]):
+        await asyncio.to_thread(self._publish_pools, pool_ids)
+
+    async def shared_pools(self) -> List[str]:
+        return await asyncio.to_thread(self._shared_pools)
+
+class PostgresCoordinator:
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.pool = None
+
+    async def _get_pool(self):
+        if self.pool is None:
+            import asyncpg
+            self.pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=2)
+            async with self.pool.acquire() as conn:
+                await conn.execute(WORKERS_SCHEMA)
+                await conn.execute(DISCOVERY_SCHEMA)
+        return self.pool
+
+    async def heartbeat(self, worker_id: str, ttl: float) -> List[str]:
+        pool = await self._get_pool()
+        now = time.time()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "INSERT INTO scanner_workers (worker_id, last_heartbeat, lease_expires) VALUES ($1, $2, $3) "
+                    "ON CONFLICT (worker_id) DO UPDATE SET last_heartbeat = EXCLUDED.last_heartbeat, "
+                    "lease_expires = EXCLUDED.lease_expires",
+                    worker_id, now, now + ttl
+                )
+                await conn.execute("DELETE FROM scanner_workers WHERE lease_expires < $1", now)
+                rows = await conn.fetch("SELECT worker_id FROM scanner_workers WHERE lease_expires >= $1", now)
+            # Keep the singleton status row alive for existing dashboards. The table comes from
+            # production/init.sql and may not exist, so this never fails the lease.
+            try:
+                await conn.execute("UPDATE scanner_status SET last_heartbeat = NOW(), updated_at = NOW() WHERE id = 1")
+            except Exception as e:
+                logger.debug(f"Skipping scanner_status update: {e}")
+        return [row["worker_id"] for row in rows]
+
+    async def leave(self, worker_id: str):
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            await conn.execute("DELETE FROM scanner_workers WHERE worker_id = $1", worker_id)
+
+    async def publish_pools(self, pool_ids: List[str]):
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            await conn.execute(
+                "INSERT INTO scanner_discovery (id, pool_ids, published_at) VALUES (1, $1, $2) "
+                "ON CONFLICT (id) DO UPDATE SET pool_ids = EXCLUDED.pool_ids, published_at = EXCLUDED.published_at",
+                json.dumps(pool_ids), time.time()
+            )
+
+    async def shared_pools(self) -> List[str]:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow("SELECT pool_ids FROM scanner_discovery WHERE id = 1")
+        return json.loads(row["pool_ids"]) if row else []
+
+def create_coordinator(url: str):
+    if url.startswith("sqlite:///"):
+        return SQLiteCoordinator(url[len("sqlite:///"):])
+    if url.startswith(("postgres://", "postgresql://")):
+        return PostgresCoordinator(url)
+    raise ValueError(f"Unsupported coordinator URL: {url}")
+
+class ShardManager:
+    def __init__(self, coordinator, worker_id: Optional[str] = None, lease_ttl: float = 30.0):
+        self.coordinator = coordinator
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_ttl = lease_ttl
+        self.ring = HashRing([self.worker_id])
+
+    async def join(self) -> List[str]:
+        # The first heartbeat is not retried: a worker that cannot register would otherwise
+        # run with a one-member ring and scan every target alongside its peers
+        members = await self.coordinator.heartbeat(self.worker_id, self.lease_ttl)
+        return self._apply(members)
+
+    async def refresh(self) -> List[str]:
+        try:
+            members = await self.coordinator.heartbeat(self.worker_id, self.lease_ttl)
+        except Exception as e:
+            # Keep the last known ring; leases of peers expire on their own if they are gone
+            logger.error(f"Coordinator heartbeat failed: {e}")
+            return self.ring.members
+        return self._apply(members)
+
+    def _apply(self, members: List[str]) -> List[str]:
+        if self.worker_id not in members:
+            members.append(self.worker_id)
+        if sorted(members) != self.ring.members:
+            logger.info(f"Shard membership changed: {sorted(members)}")
+            self.ring = HashRing(members)
+        return self.ring.members
+
+    async def run(self):
+        # Heartbeat well inside the lease so a single missed beat does not drop us
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.lease_ttl / 3)
+
+    def owns(self, key: str) -> bool:
+        return self.ring.owner(key) == self.worker_id
+
+    def filter(self, keys: Iterable[str]) -> List[str]:
+        return [key for key in keys if self.owns(key)]
+
+    async def publish_pools(self, pool_ids: List[str]):
+        await self.coordinator.publish_pools(pool_ids)
+
+    async def shared_pools(self) -> List[str]:
+        return await self.coordinator.shared_pools()
+
+    async def leave(self):
+        try:
+            await self.coordinator.leave(self.worker_id)
+        except Exception as e:
+            logger.error(f"Error leaving coordinator: {e}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class Subscriber:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message: str):
+        # Never block the publisher: a slow client loses its oldest pending events instead
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+    async def next(self, timeout: float) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class LiveFeed:
+    def __init__(self, queue_size: int = 256, heartbeat_interval: float = 30.0):
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.subscribers: Set[Subscriber] = set()
+        self._finding_hashes: Dict[str, str] = {}
+        self._status: Dict[str, Any] = {}
+        self._status_message: Optional[str] = None
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.queue_size)
+        if self._status_message:
+            subscriber.offer(self._status_message)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event: Dict[str, Any]) -> str:
+        # Serialize once, fan the same string out to every client
+        message = json.dumps(event, default=str)
+        for subscriber in list(self.subscribers):
+            subscriber.offer(message)
+        return message
+
+    def publish_finding(self, finding: Dict[str, Any]) -> bool:
+        # Finding ids are time based, so identity is the target plus the issue, and only
+        # content changes (severity, bounty, PoC, ...) are re-sent
+        key = f"{finding.get('contract_address')}:{finding.get('title')}"
+        content = {k: v for k, v in finding.items() if k not in ("id", "discovered_at")}
+        digest = hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+        if self._finding_hashes.get(key) == digest:
+            return False
+        self._finding_hashes[key] = digest
+        self.publish({"type": "vulnerability_detected", "vulnerability": finding})
+        return True
+
+    def finding_hashes(self) -> Dict[str, str]:
+        return dict(self._finding_hashes)
+
+    def restore_finding_hashes(self, hashes: Dict[str, str]):
+        self._finding_hashes.update(hashes)
+
+    def publish_status(self, status: Dict[str, Any]) -> bool:
+        changes = {k: v for k, v in status.items() if self._status.get(k) != v and k != "uptime_seconds"}
+        self._status = dict(status)
+        if not changes and self._status_message:
+            return False
+        self._status_message = self.publish({"type": "scanner_status", "status": status, "changes": changes})
+        return True
+
+    def heartbeat(self) -> str:
+        return json.dumps({"type": "heartbeat"})
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+_STANDARD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RepeatSampler(logging.Filter):
+    # Runs on the producer side so dropped records never reach the queue. Within each
+    # window the first `burst` copies of a message pass, then one in every `rate`; the
+    # next record that passes carries how many copies were suppressed.
+    def __init__(self, window: float = 3600.0, burst: int = 3, rate: int = 100, max_keys: int = 10000):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.rate = rate
+        self.max_keys = max_keys
+        self._seen: Dict[Tuple[str, int, str, Optional[str]], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Identity passed in `extra` is part of the key: the same message about a different
+        # contract is a different event, not a repeat
+        key = (record.name, record.levelno, record.getMessage(), getattr(record, "contract_address", None))
+        now = time.monotonic()
+        state = self._seen.get(key)
+        if state is None or now - state[0] > self.window:
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            suppressed = state[2] if state else 0
+            state = [now, 0, 0]
+            self._seen[key] = state
+            if suppressed:
+                record.suppressed = suppressed
+        state[1] += 1
+        if state[1] <= self.burst or (state[1] - self.burst) % self.rate == 0:
+            if state[2]:
+                record.suppressed = state[2]
+                state[2] = 0
+            return True
+        state[2] += 1
+        return False
+
+def configure_logging(log_file: Optional[str] = None) -> logging.handlers.QueueListener:
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+    formatter = JsonFormatter() if os.getenv("LOG_FORMAT", "json").lower() == "json" else logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Callers only pay for an enqueue; formatting and I/O happen on the listener thread
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RepeatSampler(
+        window=float(os.getenv("LOG_SAMPLE_WINDOW", "3600")),
+        burst=int(os.getenv("LOG_SAMPLE_BURST", "3")),
+        rate=int(os.getenv("LOG_SAMPLE_RATE", "100"))
+    ))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
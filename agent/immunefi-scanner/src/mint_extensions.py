@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+import hashlib
+import struct
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pool_state import b58encode
+
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM_ID = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PFnBqCXEpPxuEb"
+
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+USDT_MINT = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
+FREEZE_AUTHORITY_EXEMPT = frozenset({USDC_MINT, USDT_MINT})
+
+# spl-token-2022 layout: 82-byte base mint, padding up to the 165-byte account length,
+# one AccountType byte, then u16 type / u16 length TLV entries
+MINT_BASE_LEN = 82
+ACCOUNT_TYPE_OFFSET = 165
+ACCOUNT_TYPE_MINT = 1
+
+EXTENSION_TRANSFER_FEE_CONFIG = 1
+EXTENSION_MINT_CLOSE_AUTHORITY = 3
+EXTENSION_DEFAULT_ACCOUNT_STATE = 6
+EXTENSION_PERMANENT_DELEGATE = 12
+EXTENSION_TRANSFER_HOOK = 14
+
+ACCOUNT_STATE_FROZEN = 2
+
+_MINT_BASE_LAYOUT = struct.Struct("<I32sQB?I32s")
+_TLV_HEADER = struct.Struct("<HH")
+_TRANSFER_FEE_LAYOUT = struct.Struct("<32s32sQQQHQQH")
+
+def token_program_name(program: str) -> str:
+    if program == TOKEN_2022_PROGRAM_ID:
+        return "Token-2022"
+    if program == TOKEN_PROGRAM_ID:
+        return "SPL Token"
+    return "Token"
+
+def _optional_key(key: bytes) -> Optional[str]:
+    return None if key == bytes(32) else b58encode(key)
+
+@dataclass
+class TransferFeeConfig:
+    config_authority: Optional[str]
+    withdraw_withheld_authority: Optional[str]
+    withheld_amount: int
+    older_basis_points: int
+    older_maximum_fee: int
+    newer_epoch: int
+    newer_basis_points: int
+    newer_maximum_fee: int
+
+    @property
+    def max_basis_points(self) -> int:
+        return max(self.older_basis_points, self.newer_basis_points)
+
+@dataclass
+class MintInfo:
+    address: str
+    program: str
+    decimals: int
+    supply: int
+    mint_authority: Optional[str]
+    freeze_authority: Optional[str]
+    transfer_fee: Optional[TransferFeeConfig] = None
+    close_authority: Optional[str] = None
+    permanent_delegate: Optional[str] = None
+    transfer_hook_program: Optional[str] = None
+    default_frozen: bool = False
+    extension_types: List[int] = field(default_factory=list)
+
+    @classmethod
+    def from_account_data(cls, address: str, program: str, data: bytes) -> Optional["MintInfo"]:
+        if len(data) < MINT_BASE_LEN:
+            return None
+        (mint_auth_tag, mint_auth, supply, decimals, initialized,
+         freeze_tag, freeze_auth) = _MINT_BASE_LAYOUT.unpack_from(data, 0)
+        if not initialized:
+            return None
+        info = cls(
+            address=address,
+            program=program,
+            decimals=decimals,
+            supply=supply,
+            mint_authority=b58encode(mint_auth) if mint_auth_tag else None,
+            freeze_authority=b58encode(freeze_auth) if freeze_tag else None,
+        )
+        if len(data) > ACCOUNT_TYPE_OFFSET and data[ACCOUNT_TYPE_OFFSET] == ACCOUNT_TYPE_MINT:
+            for extension_type, value in _iter_tlv(data, ACCOUNT_TYPE_OFFSET + 1):
+                info._apply_extension(extension_type, value)
+        return info
+
+    def _apply_extension(self, extension_type: int, value: bytes):
+        self.extension_types.append(extension_type)
+        if extension_type == EXTENSION_TRANSFER_FEE_CONFIG and len(value) >= _TRANSFER_FEE_LAYOUT.size:
+            (config_auth, withdraw_auth, withheld, _older_epoch, older_max, older_bps,
+             newer_epoch, newer_max, newer_bps) = _TRANSFER_FEE_LAYOUT.unpack_from(value)
+            self.transfer_fee = TransferFeeConfig(
+                config_authority=_optional_key(config_auth),
+                withdraw_withheld_authority=_optional_key(withdraw_auth),
+                withheld_amount=withheld,
+                older_basis_points=older_bps,
+                older_maximum_fee=older_max,
+                newer_epoch=newer_epoch,
+                newer_basis_points=newer_bps,
+                newer_maximum_fee=newer_max,
+            )
+        elif extension_type == EXTENSION_MINT_CLOSE_AUTHORITY and len(value) >= 32:
+            self.close_authority = _optional_key(value[:32])
+        elif extension_type == EXTENSION_PERMANENT_DELEGATE and len(value) >= 32:
+            self.permanent_delegate = _optional_key(value[:32])
+        elif extension_type == EXTENSION_TRANSFER_HOOK and len(value) >= 64:
+            self.transfer_hook_program = _optional_key(value[32:64])
+        elif extension_type == EXTENSION_DEFAULT_ACCOUNT_STATE and len(value) >= 1:
+            self.default_frozen = value[0] == ACCOUNT_STATE_FROZEN
+
+def _iter_tlv(data: bytes, offset: int):
+    while offset + _TLV_HEADER.size <= len(data):
+        extension_type, length = _TLV_HEADER.unpack_from(data, offset)
+        if extension_type == 0:
+            break
+        offset += _TLV_HEADER.size
+        yield extension_type, data[offset:offset + length]
+        offset += length
+
+class MintCache:
+    def __init__(self):
+        self._entries: Dict[str, Tuple[bytes, Optional[MintInfo]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, address: str) -> Optional[MintInfo]:
+        entry = self._entries.get(address)
+        return entry[1] if entry else None
+
+    def digest(self, address: str) -> Optional[bytes]:
+        entry = self._entries.get(address)
+        return entry[0] if entry else None
+
+    def update(self, address: str, program: str, data: bytes) -> Optional[MintInfo]:
+        # Decoding is skipped while the account bytes are unchanged
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        entry = self._entries.get(address)
+        if entry and entry[0] == digest:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        info = MintInfo.from_account_data(address, program, data)
+        self._entries[address] = (digest, info)
+        return info
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {
+            address: [digest.hex(), asdict(info) if info else None]
+            for address, (digest, info) in self._entries.items()
+        }
+
+    @classmethod
+    def from_snapshot(cls, entries: Dict[str, Any]) -> "MintCache":
+        cache = cls()
+        for address, (digest, info) in entries.items():
+            if info is not None:
+                fee = info.get("transfer_fee")
+                info = MintInfo(**{**info, "transfer_fee": TransferFeeConfig(**fee) if fee else None})
+            cache._entries[address] = (bytes.fromhex(digest), info)
+        return cache
+
+def assess_mint(info: MintInfo) -> List[Dict[str, str]]:
+    risks = []
+    if info.permanent_delegate:
+        risks.append({
+            "pattern": "permanent_delegate",
+            "severity": "Critical",
+            "detail": f"Permanent delegate {info.permanent_delegate} can transfer or burn tokens held in the pool vault",
+            "fix": "Exclude mints with a permanent delegate from cp-swap pools"
+        })
+    if info.transfer_hook_program:
+        risks.append({
+            "pattern": "transfer_hook",
+            "severity": "High",
+            "detail": f"Transfer hook program {info.transfer_hook_program} runs on every vault transfer and can block swaps or withdrawals",
+            "fix": "Only allow audited transfer hook programs, or reject hooked mints at pool creation"
+        })
+    if info.default_frozen:
+        risks.append({
+            "pattern": "default_frozen",
+            "severity": "Medium",
+            "detail": "New token accounts start frozen, so users may be unable to receive swap output",
+            "fix": "Reject mints whose default account state is frozen"
+        })
+    if info.close_authority:
+        risks.append({
+            "pattern": "mint_close_authority",
+            "severity": "Medium",
+            "detail": f"Mint close authority {info.close_authority} can close and re-create the mint with different parameters",
+            "fix": "Reject mints with a close authority"
+        })
+    if info.transfer_fee and (info.transfer_fee.config_authority or info.transfer_fee.max_basis_points >= 500):
+        risks.append({
+            "pattern": "transfer_fee",
+            "severity": "Medium" if info.transfer_fee.max_basis_points >= 500 else "Low",
+            "detail": (
+                f"Transfer fee up to {info.transfer_fee.max_basis_points} bps"
+                + (f", changeable by {info.transfer_fee.config_authority}" if info.transfer_fee.config_authority else "")
+            ),
+            "fix": "Account for transfer fees in quotes and flag pools whose fee authority is not renounced"
+        })
+    # Regulated quote stablecoins keep a freeze authority by design; flagging it on every
+    # pool quoted in them would bury the findings that matter
+    if info.freeze_authority and info.address not in FREEZE_AUTHORITY_EXEMPT:
+        risks.append({
+            "pattern": "freeze_authority",
+            "severity": "Low",
+            "detail": f"Freeze authority {info.freeze_authority} can freeze the pool vault and halt the pool",
+            "fix": "Prefer mints with a renounced freeze authority"
+        })
+    program = token_program_name(info.program)
+    for risk in risks:
+        risk["program"] = program
+    return risks
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+from pathlib import Path
+from typing import Optional
+
+from aiohttp import web
+
+from traffic import TrafficIndex
+
+logger = logging.getLogger(__name__)
+
+class MockServer:
+    def __init__(
+        self,
+        index: TrafficIndex,
+        speed: float = 1.0,
+        extra_latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.index = index
+        self.speed = speed
+        self.extra_latency = extra_latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.misses = 0
+        self.runner: Optional[web.AppRunner] = None
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = None
+        if request.can_read_body:
+            try:
+                body = await request.json()
+            except json.JSONDecodeError:
+                body = None
+
+        exchange = self.index.lookup(request.method, request.path, body)
+        if exchange is None:
+            self.misses += 1
+            return web.json_response({"error": "no recorded response"}, status=404)
+
+        # speed=0 replays as fast as possible; speed=2 halves recorded latency
+        delay = (exchange.get("latency", 0.0) / self.speed if self.speed > 0 else 0.0) + self.extra_latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            if isinstance(body, dict) and "jsonrpc" in body:
+                return web.json_response({
+                    "jsonrpc": "2.0",
+                    "id": body.get("id"),
+                    "error": {"code": -32005, "message": "Injected error"}
+                })
+            return web.json_response({"error": "Injected error"}, status=503)
+
+        response = exchange["response"]
+        if isinstance(response, dict) and isinstance(body, dict) and "id" in body:
+            response = {**response, "id": body["id"]}
+        return web.json_response(response, status=exchange["status"])
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self.runner = web.AppRunner(self.build_app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded RPC/Immunefi traffic corpus")
+    parser.add_argument("corpus", type=Path)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--speed", type=float, default=1.0, help="Latency scale factor, 0 disables recorded latency")
+    parser.add_argument("--latency", type=float, default=0.0, help="Extra latency per request in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    args = parser.parse_args()
+
+    server = MockServer(TrafficIndex.from_file(args.corpus), args.speed, args.latency, args.error_rate)
+    url = await server.start(args.host, args.port)
+    logger.info(f"Replaying {args.corpus} at {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
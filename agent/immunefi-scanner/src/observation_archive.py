@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from pool_state import Observation, Q32
+
+logger = logging.getLogger(__name__)
+
+# u128 cumulative prices are split into little-endian u64 halves so every column
+# is a flat uint64 file that numpy can read straight into an array
+COLUMNS = ("block_timestamp", "cum_0_lo", "cum_0_hi", "cum_1_lo", "cum_1_hi")
+U64_MASK = (1 << 64) - 1
+
+class ObservationArchive:
+    # Only each pool's row count and last timestamp stay in memory; column files are
+    # opened per call and closed again, so thousands of pools cost no descriptors
+    def __init__(self, root: Path = Path("data/observations")):
+        self.root = root
+        self._lengths: Dict[str, int] = {}
+        self._last: Dict[str, Optional[int]] = {}
+
+    def _pool_dir(self, pool_id: str) -> Path:
+        return self.root / pool_id
+
+    def _column_path(self, pool_id: str, column: str) -> Path:
+        return self._pool_dir(pool_id) / f"{column}.u64"
+
+    def _length(self, pool_id: str) -> int:
+        length = self._lengths.get(pool_id)
+        if length is not None:
+            return length
+        # A crash between column writes can leave columns uneven; the shortest one wins
+        lengths = []
+        for column in COLUMNS:
+            path = self._column_path(pool_id, column)
+            lengths.append(path.stat().st_size // 8 if path.exists() else 0)
+        length = min(lengths)
+        self._lengths[pool_id] = length
+        return length
+
+    def _read(self, pool_id: str, column: str, lo: int, hi: int) -> np.ndarray:
+        if hi <= lo:
+            return np.empty(0, dtype=np.uint64)
+        with open(self._column_path(pool_id, column), "rb") as f:
+            f.seek(lo * 8)
+            return np.frombuffer(f.read((hi - lo) * 8), dtype="<u8").astype(np.uint64)
+
+    def columns(self, pool_id: str) -> Dict[str, np.ndarray]:
+        length = self._length(pool_id)
+        return {column: self._read(pool_id, column, 0, length) for column in COLUMNS}
+
+    def last_timestamp(self, pool_id: str) -> Optional[int]:
+        if pool_id not in self._last:
+            length = self._length(pool_id)
+            tail = self._read(pool_id, "block_timestamp", length - 1, length) if length else ()
+            self._last[pool_id] = int(tail[0]) if len(tail) else None
+        return self._last[pool_id]
+
+    def append(self, pool_id: str, observations: List[Observation]) -> int:
+        # Blocking file IO: the scanner calls this through asyncio.to_thread
+        last = self.last_timestamp(pool_id) or 0
+        fresh = sorted(
+            (o for o in observations if o.block_timestamp > last),
+            key=lambda o: o.block_timestamp
+        )
+        if not fresh:
+            return 0
+
+        length = self._length(pool_id)
+        rows = {
+            "block_timestamp": [o.block_timestamp for o in fresh],
+            "cum_0_lo": [o.cumulative_token_0_price_x32 & U64_MASK for o in fresh],
+            "cum_0_hi": [(o.cumulative_token_0_price_x32 >> 64) & U64_MASK for o in fresh],
+            "cum_1_lo": [o.cumulative_token_1_price_x32 & U64_MASK for o in fresh],
+            "cum_1_hi": [(o.cumulative_token_1_price_x32 >> 64) & U64_MASK for o in fresh],
+        }
+        self._pool_dir(pool_id).mkdir(parents=True, exist_ok=True)
+        for column in COLUMNS:
+            with open(self._column_path(pool_id, column), "r+b" if length else "wb") as f:
+                # Drop any torn tail left by an interrupted append before writing
+                f.truncate(length * 8)
+                f.seek(length * 8)
+                f.write(np.asarray(rows[column], dtype="<u8").tobytes())
+        # Readers go by the in-memory length, so they never see a half-written append
+        self._lengths[pool_id] = length + len(fresh)
+        self._last[pool_id] = fresh[-1].block_timestamp
+        return len(fresh)
+
+    def range(self, pool_id: str, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        # Timestamps locate the window; the price columns are read for that slice only
+        length = self._length(pool_id)
+        timestamps = self._read(pool_id, "block_timestamp", 0, length)
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        hi = length if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        window = {column: self._read(pool_id, column, lo, hi) for column in COLUMNS[1:]}
+        return {"block_timestamp": timestamps[lo:hi], **window}
+
+    def twap(self, pool_id: str, start: Optional[int] = None, end: Optional[int] = None) -> Optional[Dict[str, float]]:
+        window = self.range(pool_id, start, end)
+        timestamps = window["block_timestamp"]
+        if len(timestamps) < 2:
+            return None
+
+        elapsed = int(timestamps[-1]) - int(timestamps[0])
+        if elapsed <= 0:
+            return None
+        return {
+            "start": int(timestamps[0]),
+            "end": int(timestamps[-1]),
+            "samples": len(timestamps),
+            "token_0_price": _cumulative_delta(window["cum_0_lo"], window["cum_0_hi"], 0, -1) / elapsed / Q32,
+            "token_1_price": _cumulative_delta(window["cum_1_lo"], window["cum_1_hi"], 0, -1) / elapsed / Q32,
+        }
+
+    def twap_series(self, pool_id: str, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        # Per-interval TWAP between consecutive observations, fully vectorized
+        window = self.range(pool_id, start, end)
+        timestamps = window["block_timestamp"]
+        if len(timestamps) < 2:
+            empty = np.empty(0, dtype=np.float64)
+            return {"block_timestamp": timestamps[:0], "token_0_price": empty, "token_1_price": empty}
+
+        elapsed = np.diff(timestamps).astype(np.float64)
+        elapsed[elapsed == 0] = np.nan
+        return {
+            "block_timestamp": timestamps[1:],
+            "token_0_price": _cumulative_deltas(window["cum_0_lo"], window["cum_0_hi"]) / elapsed / Q32,
+            "token_1_price": _cumulative_deltas(window["cum_1_lo"], window["cum_1_hi"]) / elapsed / Q32,
+        }
+
+def _cumulative_deltas(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    # u128 subtraction on split halves: uint64 arithmetic wraps, borrow from hi when lo wrapped
+    delta_lo = lo[1:] - lo[:-1]
+    borrow = (lo[1:] < lo[:-1]).astype(np.uint64)
+    delta_hi = hi[1:] - hi[:-1] - borrow
+    return delta_hi.astype(np.float64) * 2.0 ** 64 + delta_lo.astype(np.float64)
+
+def _cumulative_delta(lo: np.ndarray, hi: np.ndarray, first: int, last: int) -> float:
+    end = (int(hi[last]) << 64) | int(lo[last])
+    begin = (int(hi[first]) << 64) | int(lo[first])
+    return float((end - begin) % (1 << 128))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import struct
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# Mirrors programs/cp-swap/src/states/{pool,oracle}.rs (repr(C, packed), little endian)
+DISCRIMINATOR_LEN = 8
+POOL_STATE_LEN = 8 + 10 * 32 + 1 * 5 + 8 * 7 + 8 * 31
+OBSERVATION_NUM = 100
+OBSERVATION_UPDATE_DURATION_DEFAULT = 15
+# Seconds of history the on-chain observation ring holds before it wraps
+OBSERVATION_RING_SPAN = OBSERVATION_NUM * OBSERVATION_UPDATE_DURATION_DEFAULT
+OBSERVATION_LEN = 8 + 16 + 16
+OBSERVATION_STATE_LEN = 8 + 1 + 2 + 32 + OBSERVATION_LEN * OBSERVATION_NUM + 8 * 4
+Q32 = 1 << 32
+
+_POOL_STATE_LAYOUT = struct.Struct("<" + "32s" * 10 + "B" * 5 + "Q" * 7)
+_OBSERVATION_HEADER_LAYOUT = struct.Struct("<?H32s")
+_OBSERVATION_LAYOUT = struct.Struct("<QQQQQ")
+# SPL token account: mint (32), owner (32), amount (u64); identical prefix under Token-2022
+TOKEN_ACCOUNT_AMOUNT_OFFSET = 64
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+def b58encode(data: bytes) -> str:
+    value = int.from_bytes(data, "big")
+    encoded = ""
+    while value:
+        value, remainder = divmod(value, 58)
+        encoded = B58_ALPHABET[remainder] + encoded
+    leading_zeros = len(data) - len(data.lstrip(b"\0"))
+    return "1" * leading_zeros + encoded
+
+def token_account_amount(data: bytes) -> Optional[int]:
+    if len(data) < TOKEN_ACCOUNT_AMOUNT_OFFSET + 8:
+        return None
+    return struct.unpack_from("<Q", data, TOKEN_ACCOUNT_AMOUNT_OFFSET)[0]
+
+@dataclass
+class PoolState:
+    amm_config: str
+    pool_creator: str
+    token_0_vault: str
+    token_1_vault: str
+    lp_mint: str
+    token_0_mint: str
+    token_1_mint: str
+    token_0_program: str
+    token_1_program: str
+    observation_key: str
+    auth_bump: int
+    status: int
+    lp_mint_decimals: int
+    mint_0_decimals: int
+    mint_1_decimals: int
+    lp_supply: int
+    protocol_fees_token_0: int
+    protocol_fees_token_1: int
+    fund_fees_token_0: int
+    fund_fees_token_1: int
+    open_time: int
+    recent_epoch: int
+
+    @classmethod
+    def from_account_data(cls, data: bytes) -> Optional["PoolState"]:
+        if len(data) < POOL_STATE_LEN:
+            return None
+        fields = _POOL_STATE_LAYOUT.unpack_from(data, DISCRIMINATOR_LEN)
+        keys = [b58encode(key) for key in fields[:10]]
+        return cls(*keys, *fields[10:])
+
+    def vault_amount_without_fee(self, vault_0: int, vault_1: int) -> Tuple[int, int]:
+        return (
+            max(vault_0 - (self.protocol_fees_token_0 + self.fund_fees_token_0), 0),
+            max(vault_1 - (self.protocol_fees_token_1 + self.fund_fees_token_1), 0),
+        )
+
+    def token_price_x32(self, vault_0: int, vault_1: int) -> Optional[Tuple[int, int]]:
+        token_0_amount, token_1_amount = self.vault_amount_without_fee(vault_0, vault_1)
+        if token_0_amount == 0 or token_1_amount == 0:
+            return None
+        return (
+            token_1_amount * Q32 // token_0_amount,
+            token_0_amount * Q32 // token_1_amount,
+        )
+
+@dataclass
+class Observation:
+    block_timestamp: int
+    cumulative_token_0_price_x32: int
+    cumulative_token_1_price_x32: int
+
+@dataclass
+class ObservationState:
+    initialized: bool
+    observation_index: int
+    pool_id: str
+    observations: List[Observation]
+
+    @classmethod
+    def from_account_data(cls, data: bytes) -> Optional["ObservationState"]:
+        if len(data) < OBSERVATION_STATE_LEN:
+            return None
+        initialized, observation_index, pool_id = _OBSERVATION_HEADER_LAYOUT.unpack_from(data, DISCRIMINATOR_LEN)
+        offset = DISCRIMINATOR_LEN + _OBSERVATION_HEADER_LAYOUT.size
+        observations = []
+        for timestamp, c0_lo, c0_hi, c1_lo, c1_hi in _OBSERVATION_LAYOUT.iter_unpack(
+            data[offset:offset + OBSERVATION_LEN * OBSERVATION_NUM]
+        ):
+            observations.append(Observation(
+                block_timestamp=timestamp,
+                cumulative_token_0_price_x32=(c0_hi << 64) | c0_lo,
+                cumulative_token_1_price_x32=(c1_hi << 64) | c1_lo,
+            ))
+        return cls(initialized, observation_index, b58encode(pool_id), observations)
+
+    def ordered_observations(self) -> List[Observation]:
+        # Oldest first; slots never written by the program have a zero timestamp
+        start = (self.observation_index + 1) % OBSERVATION_NUM
+        ring = self.observations[start:] + self.observations[:start]
+        return [o for o in ring if o.block_timestamp > 0]
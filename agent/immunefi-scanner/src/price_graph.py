@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PriceOutlier:
+    pool_id: str
+    mint_a: str
+    mint_b: str
+    pool_price: float
+    consensus_price: float
+    deviation: float
+    pool_depth: float
+    support_depth: float
+    paths: int
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "pool_id": self.pool_id,
+            "mint_a": self.mint_a,
+            "mint_b": self.mint_b,
+            "pool_price": self.pool_price,
+            "consensus_price": self.consensus_price,
+            "deviation_pct": round(self.deviation * 100, 3),
+            "pool_depth": self.pool_depth,
+            "support_depth": self.support_depth,
+            "paths": self.paths
+        }
+
+# Ordered mint pairs are keyed as src << PAIR_SHIFT | dst, so keys sort by source mint
+PAIR_SHIFT = 32
+PAIR_MASK = (1 << PAIR_SHIFT) - 1
+
+class PriceGraph:
+    # Mints are nodes and pools are edges. Edge e stores log(reserve_b / reserve_a), the raw
+    # price of mint_a in mint_b, so prices compose along a path by addition and decimals
+    # cancel. Depth is the mint_a reserve, which keeps path weights in one unit per edge.
+    #
+    # Per ordered mint pair the graph keeps running depth and depth * log price sums, updated
+    # as pools change. Current outliers are left out of those sums, so a manipulated pool
+    # never counts as support for its neighbours. The graph only sees the pools fed to it:
+    # with sharded workers that is this worker's pools, and routes through pools owned by
+    # other workers are missing from the consensus.
+    def __init__(self, threshold: float = 0.05, min_support: float = 0.5, capacity: int = 1024):
+        self.threshold = threshold
+        self.min_support = min_support
+        self.mints: List[str] = []
+        self.mint_index: Dict[str, int] = {}
+        self.pool_ids: List[Optional[str]] = []
+        self.pool_slot: Dict[str, int] = {}
+        self.incident: Dict[int, Set[int]] = {}
+        self.edge_a = np.zeros(capacity, dtype=np.int64)
+        self.edge_b = np.zeros(capacity, dtype=np.int64)
+        self.edge_logp = np.zeros(capacity, dtype=np.float64)
+        self.edge_depth_a = np.zeros(capacity, dtype=np.float64)
+        self.edge_depth_b = np.zeros(capacity, dtype=np.float64)
+        self.edge_active = np.zeros(capacity, dtype=bool)
+        self.free_slots: List[int] = []
+        self.dirty: Set[int] = set()
+        self.excluded: Set[int] = set()
+        self.outliers: Dict[str, PriceOutlier] = {}
+        self._pairs: Dict[int, List[float]] = {}
+        self._pair_pos: Dict[int, int] = {}
+        self._pair_keys = np.empty(0, dtype=np.int64)
+        self._pair_w = np.empty(0, dtype=np.float64)
+        self._pair_wl = np.empty(0, dtype=np.float64)
+        self._pair_layout_dirty = False
+
+    def _mint(self, mint: str) -> int:
+        index = self.mint_index.get(mint)
+        if index is None:
+            index = len(self.mints)
+            self.mints.append(mint)
+            self.mint_index[mint] = index
+        return index
+
+    def _grow(self):
+        size = len(self.edge_a) * 2
+        for name in ("edge_a", "edge_b", "edge_logp", "edge_depth_a", "edge_depth_b", "edge_active"):
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _slot_for(self, pool_id: str) -> int:
+        slot = self.pool_slot.get(pool_id)
+        if slot is not None:
+            return slot
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.pool_ids[slot] = pool_id
+        else:
+            slot = len(self.pool_ids)
+            if slot >= len(self.edge_a):
+                self._grow()
+            self.pool_ids.append(pool_id)
+        self.pool_slot[pool_id] = slot
+        return slot
+
+    def _neighbours(self, slot: int) -> Set[int]:
+        # Any two-hop path through this edge has one of its mints as an endpoint, so only
+        # edges incident to those mints can see a different consensus
+        return self.incident.get(int(self.edge_a[slot]), set()) | self.incident.get(int(self.edge_b[slot]), set())
+
+    def _mark_dirty(self, slot: int):
+        self.dirty.update(self._neighbours(slot))
+        self.dirty.add(slot)
+
+    def _add_pair(self, key: int, weight: float, weighted_logp: float, edges: int):
+        entry = self._pairs.get(key)
+        if entry is None:
+            entry = self._pairs[key] = [0.0, 0.0, 0]
+            self._pair_layout_dirty = True
+        entry[0] += weight
+        entry[1] += weighted_logp
+        entry[2] += edges
+        if entry[2] == 0:
+            del self._pairs[key]
+            self._pair_layout_dirty = True
+        elif not self._pair_layout_dirty:
+            position = self._pair_pos[key]
+            self._pair_w[position] = entry[0]
+            self._pair_wl[position] = entry[1]
+
+    def _contribute(self, slot: int, sign: int):
+        # Both directions of the pool: a -> b weighted by the a reserve, b -> a by the b reserve
+        a, b = int(self.edge_a[slot]), int(self.edge_b[slot])
+        logp = float(self.edge_logp[slot])
+        depth_a, depth_b = float(self.edge_depth_a[slot]), float(self.edge_depth_b[slot])
+        self._add_pair((a << PAIR_SHIFT) | b, sign * depth_a, sign * depth_a * logp, sign)
+        self._add_pair((b << PAIR_SHIFT) | a, sign * depth_b, -sign * depth_b * logp, sign)
+
+    def update_pool(self, pool_id: str, mint_a: str, mint_b: str, reserve_a: int, reserve_b: int):
+        if reserve_a <= 0 or reserve_b <= 0 or mint_a == mint_b:
+            self.remove_pool(pool_id)
+            return
+        slot = self._slot_for(pool_id)
+        a, b = self._mint(mint_a), self._mint(mint_b)
+        if self.edge_active[slot]:
+            self._mark_dirty(slot)
+            if slot not in self.excluded:
+                self._contribute(slot, -1)
+            self.incident[int(self.edge_a[slot])].discard(slot)
+            self.incident[int(self.edge_b[slot])].discard(slot)
+        self.edge_a[slot] = a
+        self.edge_b[slot] = b
+        self.edge_logp[slot] = math.log(reserve_b) - math.log(reserve_a)
+        self.edge_depth_a[slot] = reserve_a
+        self.edge_depth_b[slot] = reserve_b
+        self.edge_active[slot] = True
+        self.incident.setdefault(a, set()).add(slot)
+        self.incident.setdefault(b, set()).add(slot)
+        # An outlier stays out of the sums until it is evaluated again
+        if slot not in self.excluded:
+            self._contribute(slot, 1)
+        self._mark_dirty(slot)
+
+    def remove_pool(self, pool_id: str):
+        slot = self.pool_slot.pop(pool_id, None)
+        if slot is None:
+            return
+        if self.edge_active[slot]:
+            self._mark_dirty(slot)
+            if slot not in self.excluded:
+                self._contribute(slot, -1)
+            self.incident[int(self.edge_a[slot])].discard(slot)
+            self.incident[int(self.edge_b[slot])].discard(slot)
+        self.edge_active[slot] = False
+        self.pool_ids[slot] = None
+        self.free_slots.append(slot)
+        self.dirty.discard(slot)
+        self.excluded.discard(slot)
+        self.outliers.pop(pool_id, None)
+
+    def pair_table(self):
+        # Sorted pair keys with their depth and depth * log price sums. The arrays are only
+        # rebuilt when a pair appears or disappears; otherwise they are updated in place.
+        if self._pair_layout_dirty:
+            keys = sorted(self._pairs)
+            self._pair_keys = np.asarray(keys, dtype=np.int64)
+            self._pair_w = np.asarray([self._pairs[k][0] for k in keys], dtype=np.float64)
+            self._pair_wl = np.asarray([self._pairs[k][1] for k in keys], dtype=np.float64)
+            self._pair_pos = {k: i for i, k in enumerate(keys)}
+            self._pair_layout_dirty = False
+        return self._pair_keys, self._pair_w, self._pair_wl
+
+    def _score(self, slots: np.ndarray):
+        keys, pair_w, pair_wl = self.pair_table()
+        count = len(slots)
+        a = self.edge_a[slots]
+        b = self.edge_b[slots]
+        own_logp = self.edge_logp[slots]
+        own_a = self.edge_depth_a[slots]
+        own_b = self.edge_depth_b[slots]
+        counted = ~np.isin(slots, np.fromiter(self.excluded, dtype=np.int64, count=len(self.excluded)))
+
+        def lookup(wanted):
+            position = np.minimum(np.searchsorted(keys, wanted), max(len(keys) - 1, 0))
+            found = keys[position] == wanted if len(keys) else np.zeros(len(wanted), dtype=bool)
+            return position, found
+
+        # Parallel pools on the same pair, without the edge under test
+        ab, ab_found = lookup((a << PAIR_SHIFT) | b)
+        par_w = np.where(ab_found, pair_w[ab] if len(keys) else 0.0, 0.0) - np.where(counted, own_a, 0.0)
+        par_wl = np.where(ab_found, pair_wl[ab] if len(keys) else 0.0, 0.0) - np.where(counted, own_a * own_logp, 0.0)
+        has_par = par_w > own_a * 1e-9
+        par_owner = np.flatnonzero(has_par)
+        par_l = par_wl[has_par] / par_w[has_par]
+
+        # Two-hop paths a -> x -> b: expand each edge into its (a, x) pairs, then look up (x, b)
+        pair_src = keys >> PAIR_SHIFT
+        lo = np.searchsorted(pair_src, a, side="left")
+        hi = np.searchsorted(pair_src, a, side="right")
+        counts = hi - lo
+        owner = np.repeat(np.arange(count), counts)
+        starts = np.repeat(lo - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+        hop1 = starts + np.arange(counts.sum())
+        x = keys[hop1] & PAIR_MASK
+        keep = x != b[owner]
+        owner, hop1, x = owner[keep], hop1[keep], x[keep]
+        hop2, found = lookup((x << PAIR_SHIFT) | b[owner])
+        owner, hop1, hop2 = owner[found], hop1[found], hop2[found]
+
+        l1 = pair_wl[hop1] / pair_w[hop1]
+        l2 = pair_wl[hop2] / pair_w[hop2]
+        # Path depth in mint_a units: the thinner of hop 1 and hop 2 converted back through hop 1
+        path_w = np.minimum(pair_w[hop1], pair_w[hop2] * np.exp(-l1))
+
+        # Consensus is the weighted median over sources (parallel pools, then each path), so a
+        # single bad source cannot drag it the way it drags a mean
+        source_owner = np.concatenate([par_owner, owner])
+        source_l = np.concatenate([par_l, l1 + l2])
+        source_w = np.concatenate([par_w[has_par], path_w])
+        order = np.lexsort((source_l, source_owner))
+        source_owner, source_l, source_w = source_owner[order], source_l[order], source_w[order]
+        support = np.bincount(source_owner, weights=source_w, minlength=count)
+        cumulative = np.cumsum(source_w)
+        group_start = np.searchsorted(source_owner, np.arange(count))
+        before = np.concatenate([[0.0], cumulative])[group_start]
+        reached = np.flatnonzero(cumulative - before[source_owner] >= support[source_owner] * 0.5)
+        _, first = np.unique(source_owner[reached], return_index=True)
+        consensus = np.full(count, np.nan)
+        consensus[source_owner[reached[first]]] = source_l[reached[first]]
+
+        with np.errstate(invalid="ignore"):
+            deviation = np.expm1(np.abs(own_logp - consensus))
+            # A swap grows one reserve and drains the other, so depth is the thinner side at
+            # the consensus price; dumping tokens into a pool does not make it look deeper
+            depth = np.minimum(own_a, own_b * np.exp(-consensus))
+            flagged = (support > 0) & (support >= depth * self.min_support) & (deviation > self.threshold)
+        paths = np.bincount(owner, minlength=count) + has_par
+        return a, b, own_logp, consensus, deviation, depth, support, paths, flagged
+
+    def _exclude(self, slot: int, excluded: bool) -> Set[int]:
+        if excluded == (slot in self.excluded):
+            return set()
+        if excluded:
+            self.excluded.add(slot)
+            self._contribute(slot, -1)
+        else:
+            self.excluded.discard(slot)
+            self._contribute(slot, 1)
+        return self._neighbours(slot) - {slot}
+
+    def evaluate(self, slots: Optional[List[int]] = None) -> List[PriceOutlier]:
+        # Each round scores the pending edges and blames at most one new edge: the flagged
+        # edge whose disagreeing support is largest relative to its own depth. It leaves the
+        # pair sums and its neighbours are scored again, so an honest pool whose consensus
+        # ran through a manipulated one is cleared once the manipulated pool is excluded.
+        if slots is None:
+            slots, self.dirty = self.dirty, set()
+        pending = {s for s in slots if s < len(self.pool_ids) and self.edge_active[s]}
+        rounds = 2 * len(pending) + 8
+        while pending and rounds:
+            rounds -= 1
+            batch = np.asarray(sorted(pending), dtype=np.int64)
+            pending = set()
+            a, b, own_logp, consensus, deviation, depth, support, paths, flagged = self._score(batch)
+
+            candidates = [i for i in np.flatnonzero(flagged).tolist() if int(batch[i]) not in self.excluded]
+            blamed = max(candidates, key=lambda i: support[i] / depth[i]) if candidates else None
+            for i, slot in enumerate(batch.tolist()):
+                pool_id = self.pool_ids[slot]
+                if not flagged[i]:
+                    self.outliers.pop(pool_id, None)
+                    pending |= self._exclude(slot, False)
+                    continue
+                if slot not in self.excluded and i != blamed:
+                    # Possibly explained by this round's outlier; decided in a later round
+                    pending.add(slot)
+                    continue
+                pending |= self._exclude(slot, True)
+                self.outliers[pool_id] = PriceOutlier(
+                    pool_id=pool_id,
+                    mint_a=self.mints[int(a[i])],
+                    mint_b=self.mints[int(b[i])],
+                    pool_price=float(np.exp(own_logp[i])),
+                    consensus_price=float(np.exp(consensus[i])),
+                    deviation=float(deviation[i]),
+                    pool_depth=float(depth[i]),
+                    support_depth=float(support[i]),
+                    paths=int(paths[i])
+                )
+            pending = {s for s in pending if self.edge_active[s]}
+        # Anything left when the round cap is hit is picked up by the next evaluation
+        self.dirty |= pending
+        return list(self.outliers.values())
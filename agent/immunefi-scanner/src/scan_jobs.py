@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first; out-of-range requests are clamped so no caller can jump the whole queue
+PRIORITY_MIN = 0
+PRIORITY_MAX = 9
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class QuotaExceededError(Exception):
+    pass
+
+@dataclass
+class ScanJob:
+    id: str
+    contract_address: str
+    priority: int
+    created_at: datetime
+    client_ids: List[str] = field(default_factory=list)
+    status: JobStatus = JobStatus.QUEUED
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[List[Dict[str, Any]]] = None
+    error: Optional[str] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "contract_address": self.contract_address,
+            "priority": self.priority,
+            "status": self.status.value,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "vulnerabilities_found": len(self.result) if self.result is not None else None,
+            "result": self.result,
+            "error": self.error
+        }
+
+class ScanJobQueue:
+    def __init__(
+        self,
+        scan_fn: Callable[[str], Awaitable[List[Any]]],
+        max_workers: int = 4,
+        client_quota: int = 20,
+        job_ttl: int = 3600
+    ):
+        self.scan_fn = scan_fn
+        self.max_workers = max_workers
+        self.client_quota = client_quota
+        self.job_ttl = job_ttl
+        self.jobs: Dict[str, ScanJob] = {}
+        self._in_flight: Dict[str, ScanJob] = {}
+        self._client_active: Dict[str, int] = {}
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        for _ in range(self.max_workers):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def submit(self, contract_address: str, client_id: str, priority: int = 5) -> ScanJob:
+        priority = min(PRIORITY_MAX, max(PRIORITY_MIN, priority))
+        # Identical in-flight requests share one job, and joining one is free
+        job = self._in_flight.get(contract_address)
+        if job:
+            if client_id not in job.client_ids:
+                job.client_ids.append(client_id)
+            if job.status == JobStatus.QUEUED and priority < job.priority:
+                # Re-queue at the better priority; the worker skips the stale entry
+                job.priority = priority
+                self._queue.put_nowait((priority, next(self._sequence), job.id))
+            return job
+
+        if self._client_active.get(client_id, 0) >= self.client_quota:
+            raise QuotaExceededError(f"Client {client_id} already has {self.client_quota} scans pending")
+
+        self._prune()
+        job = ScanJob(
+            id=uuid.uuid4().hex,
+            contract_address=contract_address,
+            priority=priority,
+            created_at=datetime.now(),
+            client_ids=[client_id]
+        )
+        self.jobs[job.id] = job
+        self._in_flight[contract_address] = job
+        self._client_active[client_id] = self._client_active.get(client_id, 0) + 1
+        self._queue.put_nowait((priority, next(self._sequence), job.id))
+        return job
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        return self.jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "queued": sum(1 for j in self._in_flight.values() if j.status == JobStatus.QUEUED),
+            "running": sum(1 for j in self._in_flight.values() if j.status == JobStatus.RUNNING),
+            "tracked_jobs": len(self.jobs)
+        }
+
+    async def _worker(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if not job or job.status != JobStatus.QUEUED:
+                continue
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now()
+            try:
+                vulnerabilities = await self.scan_fn(job.contract_address)
+                job.result = [v.to_dict() for v in vulnerabilities]
+                job.status = JobStatus.COMPLETED
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Manual scan job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = JobStatus.FAILED
+            finally:
+                job.finished_at = datetime.now()
+                self._release(job)
+
+    def _release(self, job: ScanJob):
+        if self._in_flight.get(job.contract_address) is job:
+            del self._in_flight[job.contract_address]
+        # Only the submitting client is charged against the quota
+        owner = job.client_ids[0]
+        remaining = self._client_active.get(owner, 1) - 1
+        if remaining > 0:
+            self._client_active[owner] = remaining
+        else:
+            self._client_active.pop(owner, None)
+
+    def _prune(self):
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if not job.is_active and job.finished_at and job.finished_at.timestamp() < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
@@ -6,16 +6,37 @@ import logging
 import json
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import hashlib
+import base64
 import os
+import socket
 from pathlib import Path
 
-logging.basicConfig(level=logging.INFO)
+from pool_state import PoolState, ObservationState, OBSERVATION_RING_SPAN, POOL_STATE_LEN, token_account_amount
+from observation_archive import ObservationArchive
+from live_feed import LiveFeed
+from traffic import RecordingSession
+from coordination import DISCOVERY_KEY, ShardManager
+from mint_extensions import MintCache, assess_mint
+from logging_setup import configure_logging
+from alerts import AlertDispatcher
+from tracing import Tracer, LoopWatchdog
+from adaptive_scheduler import AdaptiveScheduler, RpcBudget
+from price_graph import PriceGraph
+from valuation import FundsAtRiskEstimator, USDC_MINT
+from stats_rollup import StatsRollup
+from snapshot import claim_snapshot_path, read_snapshot, write_snapshot
+
 logger = logging.getLogger(__name__)
 
+# getMultipleAccounts accepts at most 100 keys per request
+MULTIPLE_ACCOUNTS_LIMIT = 100
+# A pool must be re-read before its oracle ring wraps, or the archive loses observations
+MAX_POLL_INTERVAL = OBSERVATION_RING_SPAN * 0.8
+
 class SeverityLevel(Enum):
     CRITICAL = "Critical"
     HIGH = "High" 
@@ -42,6 +63,14 @@ class Vulnerability:
         data['severity'] = self.severity.value
         data['discovered_at'] = self.discovered_at.isoformat()
         return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Vulnerability":
+        return cls(**{
+            **data,
+            "severity": SeverityLevel(data["severity"]),
+            "discovered_at": datetime.fromisoformat(data["discovered_at"])
+        })
 
 class ImmunefiBountyCalculator:
     BOUNTY_RANGES = {
@@ -68,14 +97,88 @@ class VulnerabilityScanner:
         self.scan_interval = scan_interval
         self.session: Optional[aiohttp.ClientSession] = None
         self.vulnerabilities: List[Vulnerability] = []
+        self.stats = StatsRollup(severity.value for severity in SeverityLevel)
         self.last_scan: Optional[datetime] = None
         self.is_running = False
+        self.rpc_endpoint = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
+        self.immunefi_api = os.getenv("IMMUNEFI_API_URL", "https://immunefi.com/api/v1/bounties")
+        self.program_id = os.getenv("CP_SWAP_PROGRAM_ID", "CPMMoo8L3F4NbTegBCKVNunggL7H1ZpdTHKxQB5qKP1C")
+        self.configured_pools = [p.strip() for p in os.getenv("CP_SWAP_POOLS", "").split(",") if p.strip()]
+        self.pool_discovery_interval = int(os.getenv("POOL_DISCOVERY_INTERVAL", "3600"))
+        self.pools: Dict[str, PoolState] = {}
+        self.last_pool_discovery: Optional[float] = None
+        self.observation_archive = ObservationArchive()
+        self.shard: Optional[ShardManager] = None
+        self.mint_cache = MintCache()
+        self.reported_mints: Dict[str, bytes] = {}
+        self.alerts: Optional[AlertDispatcher] = None
+        self.tracer = Tracer(enabled=os.getenv("TRACE_ENABLED", "false").lower() == "true")
+        self.trace_dir = Path(os.getenv("TRACE_DIR", "data/traces"))
+        self.watchdog: Optional[LoopWatchdog] = None
+        self.pool_vaults: Dict[str, Tuple[int, int]] = {}
+        self.check_signatures = os.getenv("ADAPTIVE_SIGNATURES", "false").lower() == "true"
+        # Every RPC request is charged here: polling, discovery, mint fetches and contract checks
+        self.rpc_budget = RpcBudget(float(os.getenv("RPC_BUDGET_RPS", "2")))
+        self.scheduler: Optional[AdaptiveScheduler] = None
+        if os.getenv("ADAPTIVE_POLLING", "true").lower() == "true":
+            max_interval = float(os.getenv("ADAPTIVE_MAX_INTERVAL", str(MAX_POLL_INTERVAL)))
+            if max_interval > MAX_POLL_INTERVAL:
+                logger.warning(f"ADAPTIVE_MAX_INTERVAL {max_interval:.0f}s would let oracle rings wrap unread, using {MAX_POLL_INTERVAL:.0f}s")
+                max_interval = MAX_POLL_INTERVAL
+            # A poll reads 4 accounts through getMultipleAccounts
+            self.scheduler = AdaptiveScheduler(
+                min_interval=float(os.getenv("ADAPTIVE_MIN_INTERVAL", "5")),
+                max_interval=max_interval,
+                initial_interval=float(scan_interval),
+                poll_cost=4 / MULTIPLE_ACCOUNTS_LIMIT + (1.0 if self.check_signatures else 0.0),
+                budget=self.rpc_budget
+            )
+        self.poll_task: Optional[asyncio.Task] = None
+        self.price_graph = PriceGraph(
+            threshold=float(os.getenv("PRICE_DEVIATION_THRESHOLD", "0.05")),
+            min_support=float(os.getenv("PRICE_MIN_SUPPORT", "0.5"))
+        )
+        self.valuation = FundsAtRiskEstimator(
+            self.price_graph,
+            quote_mint=os.getenv("VALUATION_QUOTE_MINT", USDC_MINT),
+            quote_decimals=int(os.getenv("VALUATION_QUOTE_DECIMALS", "6"))
+        )
+        self.live_feed = LiveFeed()
+        self.started_at: Optional[datetime] = None
+        self.scan_count = 0
+        # Without SNAPSHOT_PATH, a per-process slot is claimed on entry
+        self.snapshot_path: Optional[Path] = Path(os.getenv("SNAPSHOT_PATH")) if os.getenv("SNAPSHOT_PATH") else None
+        self.snapshot_interval = float(os.getenv("SNAPSHOT_INTERVAL", "300"))
+        self.last_snapshot = time.monotonic()
         
     async def __aenter__(self):
         self.session = aiohttp.ClientSession()
+        record_path = os.getenv("TRAFFIC_RECORD")
+        if record_path:
+            self.session = RecordingSession(self.session, Path(record_path))
+        self.alerts = AlertDispatcher.from_env()
+        if self.alerts:
+            self.alerts.start()
+        if self.snapshot_interval > 0:
+            if self.snapshot_path is None:
+                self.snapshot_path = await asyncio.to_thread(claim_snapshot_path, Path("data/state"), self._snapshot_stem())
+            # Reading and decoding run off the loop; only the swap-in happens on it
+            decoded = await asyncio.to_thread(self._read_state)
+            if decoded:
+                self.apply_state(decoded)
+        slow_callback_ms = int(os.getenv("SLOW_CALLBACK_MS", "0"))
+        if slow_callback_ms > 0:
+            self.watchdog = LoopWatchdog(asyncio.get_running_loop(), threshold=slow_callback_ms / 1000)
+            self.watchdog.start()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.snapshot_interval > 0:
+            await self.save_snapshot()
+        if self.watchdog:
+            self.watchdog.stop()
+        if self.alerts:
+            await self.alerts.stop()
         if self.session:
             await self.session.close()
     
@@ -116,11 +219,12 @@ class VulnerabilityScanner:
         ]
         
         for vuln_config in common_vulnerabilities:
-            result = await vuln_config["check"](contract_address)
+            with self.tracer.span(f"check.{vuln_config['pattern']}", target=contract_address):
+                result = await vuln_config["check"](contract_address)
             if result:
                 vuln_id = hashlib.sha256(f"{contract_address}_{vuln_config['pattern']}_{int(time.time())}".encode()).hexdigest()[:16]
                 
-                bounty_info = ImmunefiBountyCalculator.calculate_bounty(vuln_config["severity"])
+                bounty_info = self._bounty_for(vuln_config["severity"], contract_address)
                 
                 vulnerability = Vulnerability(
                     id=vuln_id,
@@ -210,7 +314,6 @@ class VulnerabilityScanner:
     
     async def _fetch_contract_code(self, contract_address: str) -> Optional[str]:
         try:
-            rpc_endpoint = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
             payload = {
                 "jsonrpc": "2.0",
                 "id": 1,
@@ -218,19 +321,242 @@ class VulnerabilityScanner:
                 "params": [contract_address, {"encoding": "base64"}]
             }
             
-            async with self.session.post(rpc_endpoint, json=payload) as response:
-                data = await response.json()
+            self.rpc_budget.charge()
+            with self.tracer.span("fetch.getAccountInfo", target=contract_address):
+                async with self.session.post(self.rpc_endpoint, json=payload) as response:
+                    data = await response.json()
                 if "result" in data and data["result"]:
                     return str(data["result"])
         except Exception as e:
             logger.error(f"Error fetching contract code: {e}")
         return None
     
+    async def _rpc_call(self, method: str, params: List[Any]) -> Optional[Any]:
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        self.rpc_budget.charge()
+        with self.tracer.span(f"fetch.{method}"):
+            async with self.session.post(self.rpc_endpoint, json=payload) as response:
+                data = await response.json()
+            if "error" in data:
+                logger.error(f"RPC {method} failed: {data['error']}")
+                return None
+            return data.get("result")
+
+    async def _fetch_multiple_accounts(self, addresses: List[str]) -> Dict[str, Optional[bytes]]:
+        accounts: Dict[str, Optional[bytes]] = {}
+        for i in range(0, len(addresses), MULTIPLE_ACCOUNTS_LIMIT):
+            chunk = addresses[i:i + MULTIPLE_ACCOUNTS_LIMIT]
+            try:
+                result = await self._rpc_call("getMultipleAccounts", [chunk, {"encoding": "base64"}])
+                values = result["value"] if result else [None] * len(chunk)
+            except Exception as e:
+                logger.error(f"Error fetching accounts: {e}")
+                values = [None] * len(chunk)
+            for address, value in zip(chunk, values):
+                accounts[address] = base64.b64decode(value["data"][0]) if value else None
+        return accounts
+
+    async def discover_pools(self) -> Dict[str, PoolState]:
+        now = time.time()
+        if self.last_pool_discovery and now - self.last_pool_discovery < self.pool_discovery_interval:
+            return self.pools
+
+        pools: Dict[str, PoolState] = {}
+        try:
+            pool_ids = self.configured_pools
+            if not pool_ids and self.shard and not self._owns(DISCOVERY_KEY):
+                # Another replica lists the program and publishes the ids; nothing to do
+                # until it has, and only the pools this worker owns are fetched
+                pool_ids = await self.shard.shared_pools()
+                if not pool_ids:
+                    return self.pools
+            if pool_ids:
+                accounts = await self._fetch_multiple_accounts([p for p in pool_ids if self._owns(p)])
+                for address, data in accounts.items():
+                    pool = PoolState.from_account_data(data) if data else None
+                    if pool:
+                        pools[address] = pool
+            else:
+                result = await self._rpc_call("getProgramAccounts", [
+                    self.program_id,
+                    {"encoding": "base64", "filters": [{"dataSize": POOL_STATE_LEN}]}
+                ])
+                for account in result or []:
+                    pool = PoolState.from_account_data(base64.b64decode(account["account"]["data"][0]))
+                    if pool:
+                        pools[account["pubkey"]] = pool
+                if self.shard:
+                    await self.shard.publish_pools(list(pools))
+        except Exception as e:
+            logger.error(f"Error discovering pools: {e}")
+            return self.pools
+
+        self.pools = pools
+        self.last_pool_discovery = now
+        logger.info(f"Tracking {len(pools)} cp-swap pools")
+        return pools
+
+    async def poll_pools(self, pool_ids: List[str]) -> int:
+        # Re-reads pool, vaults and oracle for due pools in one batch and reports to the
+        # scheduler whether anything moved since the previous poll
+        polled = {pool_id: self.pools[pool_id] for pool_id in pool_ids if pool_id in self.pools}
+        addresses = []
+        for pool_id, pool in polled.items():
+            addresses.extend([pool_id, pool.token_0_vault, pool.token_1_vault, pool.observation_key])
+        with self.tracer.span("fetch.poll_pools", pools=len(polled)):
+            accounts = await self._fetch_multiple_accounts(addresses)
+        
+        changed_count = 0
+        for pool_id, pool in polled.items():
+            # Rediscovery may have replaced self.pools during the fetch
+            tracked = pool_id in self.pools
+            pool_data = accounts.get(pool_id)
+            fresh = PoolState.from_account_data(pool_data) if pool_data else None
+            if fresh:
+                pool = fresh
+                if tracked:
+                    self.pools[pool_id] = fresh
+            vault_0 = accounts.get(pool.token_0_vault)
+            vault_1 = accounts.get(pool.token_1_vault)
+            vaults = None
+            if vault_0 and vault_1:
+                vaults = (token_account_amount(vault_0) or 0, token_account_amount(vault_1) or 0)
+                if tracked:
+                    self.pool_vaults[pool_id] = vaults
+                    reserve_0, reserve_1 = pool.vault_amount_without_fee(*vaults)
+                    self.price_graph.update_pool(pool_id, pool.token_0_mint, pool.token_1_mint, reserve_0, reserve_1)
+            observation_data = accounts.get(pool.observation_key)
+            observations = ObservationState.from_account_data(observation_data) if observation_data else None
+            if observations and observations.initialized:
+                try:
+                    await asyncio.to_thread(self.observation_archive.append, pool_id, observations.ordered_observations())
+                except Exception as e:
+                    logger.error(f"Error archiving observations for {pool_id}: {e}")
+            
+            activity = self.scheduler.pools.get(pool_id) if self.scheduler else None
+            if activity is None:
+                continue
+            if not (fresh and vaults and observations):
+                # A failed or partial fetch says nothing about activity: back off as if idle
+                # and keep the last complete fingerprint for the next comparison
+                self.scheduler.observe(pool_id, False)
+                continue
+            fingerprint = (pool.recent_epoch, vaults, observations.observation_index)
+            changed = activity.fingerprint is not None and fingerprint != activity.fingerprint
+            activity.fingerprint = fingerprint
+            if not changed and self.check_signatures:
+                changed = await self._has_new_signature(pool_id, activity)
+            self.scheduler.observe(pool_id, changed)
+            changed_count += changed
+        return changed_count
+    
+    async def _has_new_signature(self, pool_id: str, activity) -> bool:
+        try:
+            result = await self._rpc_call("getSignaturesForAddress", [pool_id, {"limit": 1}])
+        except Exception as e:
+            logger.error(f"Error fetching signatures for {pool_id}: {e}")
+            return False
+        latest = result[0]["signature"] if result else None
+        changed = activity.last_signature is not None and latest != activity.last_signature
+        activity.last_signature = latest
+        return changed
+    
+    async def adaptive_poll_loop(self):
+        while self.is_running:
+            try:
+                owned = [pool_id for pool_id in self.pools if self._owns(pool_id)]
+                self.scheduler.track(owned)
+                due = self.scheduler.due()
+                if due:
+                    try:
+                        await self.poll_pools(due)
+                    finally:
+                        # Pools popped from the schedule but never observed would not be polled again
+                        self.scheduler.requeue(due)
+            except Exception as e:
+                logger.error(f"Error during adaptive polling: {e}")
+            await asyncio.sleep(1)
+    
+    def scan_price_graph(self) -> List[Vulnerability]:
+        # Only edges touched since the last evaluation are recomputed
+        vulnerabilities = []
+        critical_threshold = float(os.getenv("PRICE_DEVIATION_CRITICAL", "0.25"))
+        for outlier in self.price_graph.evaluate():
+            if not self._owns(outlier.pool_id):
+                continue
+            severity = SeverityLevel.CRITICAL if outlier.deviation >= critical_threshold else SeverityLevel.HIGH
+            vuln_id = hashlib.sha256(f"{outlier.pool_id}_price_divergence_{int(time.time())}".encode()).hexdigest()[:16]
+            bounty_info = self._bounty_for(severity, outlier.pool_id)
+            vulnerabilities.append(Vulnerability(
+                id=vuln_id,
+                title="Cross-Pool Price Divergence",
+                description=(
+                    f"Pool price {outlier.pool_price:.6g} deviates {outlier.deviation * 100:.1f}% from the "
+                    f"liquidity-weighted median {outlier.consensus_price:.6g} across {outlier.paths} neighbouring route(s)"
+                ),
+                severity=severity,
+                bounty_min=bounty_info["min"],
+                bounty_max=bounty_info["max"],
+                proof_of_concept=(
+                    f"1. Compare pool reserves for {outlier.mint_a}/{outlier.mint_b} against direct and two-hop routes\n"
+                    f"2. Arbitrage or oracle reads against this pool settle at the manipulated price"
+                ),
+                fix_suggestion="Check the pool's recent swaps for manipulation and consult its TWAP before relying on spot price",
+                discovered_at=datetime.now(),
+                contract_address=outlier.pool_id
+            ))
+        return vulnerabilities
+    
+    async def scan_pool_mints(self, pools: Dict[str, PoolState]) -> List[Vulnerability]:
+        # Each distinct mint is fetched once per cycle however many pools share it
+        mint_programs: Dict[str, str] = {}
+        for pool in pools.values():
+            mint_programs[pool.token_0_mint] = pool.token_0_program
+            mint_programs[pool.token_1_mint] = pool.token_1_program
+        
+        accounts = await self._fetch_multiple_accounts(list(mint_programs))
+        mint_risks: Dict[str, List[Dict[str, str]]] = {}
+        for mint, data in accounts.items():
+            info = self.mint_cache.update(mint, mint_programs[mint], data) if data else self.mint_cache.get(mint)
+            if info:
+                mint_risks[mint] = assess_mint(info)
+        
+        # Standing risks are reported once per pool and mint, and again only when the
+        # mint account changes
+        vulnerabilities = []
+        reported: Dict[str, bytes] = {}
+        for pool_id, pool in pools.items():
+            for mint in (pool.token_0_mint, pool.token_1_mint):
+                key = f"{pool_id}:{mint}"
+                digest = self.mint_cache.digest(mint)
+                if digest is None:
+                    continue
+                reported[key] = digest
+                if self.reported_mints.get(key) == digest:
+                    continue
+                for risk in mint_risks.get(mint, []):
+                    severity = SeverityLevel(risk["severity"])
+                    vuln_id = hashlib.sha256(f"{pool_id}_{mint}_{risk['pattern']}".encode()).hexdigest()[:16]
+                    bounty_info = self._bounty_for(severity, pool_id)
+                    vulnerabilities.append(Vulnerability(
+                        id=vuln_id,
+                        title=f"{risk['program']} {risk['pattern'].replace('_', ' ').title()} on Pool Mint {mint}",
+                        description=risk["detail"],
+                        severity=severity,
+                        bounty_min=bounty_info["min"],
+                        bounty_max=bounty_info["max"],
+                        proof_of_concept=f"Pool {pool_id} holds mint {mint} in a vault it does not fully control",
+                        fix_suggestion=risk["fix"],
+                        discovered_at=datetime.now(),
+                        contract_address=pool_id
+                    ))
+        self.reported_mints = reported
+        return vulnerabilities
+    
     async def scan_immunefi_bounties(self) -> List[Vulnerability]:
         vulnerabilities = []
         try:
-            immunefi_api = "https://immunefi.com/api/v1/bounties"
-            async with self.session.get(immunefi_api) as response:
+            async with self.session.get(self.immunefi_api) as response:
                 if response.status == 200:
                     data = await response.json()
                     for bounty in data.get("bounties", []):
@@ -267,39 +593,231 @@ class VulnerabilityScanner:
         else:
             return SeverityLevel.INFO
     
+    def estimate_funds_at_risk(self, contract_address: Optional[str]) -> Optional[int]:
+        # A pool risks its own reserves; the program risks every pool this worker values
+        if contract_address in self.pools:
+            value = self.valuation.pool_value(
+                contract_address, self.pools[contract_address], self.pool_vaults.get(contract_address)
+            )
+        elif contract_address == self.program_id and self.pools:
+            values = [
+                self.valuation.pool_value(pool_id, pool, self.pool_vaults.get(pool_id))
+                for pool_id, pool in self.pools.items()
+            ]
+            values = [v for v in values if v is not None]
+            value = sum(values) if values else None
+        else:
+            value = None
+        return int(round(value)) if value is not None else None
+
+    def funds_at_risk_scope(self, contract_address: Optional[str]) -> Optional[str]:
+        # A sharded replica only values the pools it owns, so a program-level figure is a lower bound
+        if contract_address in self.pools:
+            return "pool"
+        if contract_address == self.program_id:
+            return "shard" if self.shard else "program"
+        return None
+
+    def _bounty_for(self, severity: SeverityLevel, contract_address: Optional[str]) -> Dict[str, int]:
+        funds_at_risk = self.estimate_funds_at_risk(contract_address) if severity == SeverityLevel.CRITICAL else None
+        return ImmunefiBountyCalculator.calculate_bounty(severity, funds_at_risk)
+    
+    def record_findings(self, vulnerabilities: List[Vulnerability]):
+        self.vulnerabilities.extend(vulnerabilities)
+        for vuln in vulnerabilities:
+            self.stats.record(vuln.severity.value, vuln.bounty_max, vuln.discovered_at.timestamp())
+    
+    @staticmethod
+    def _snapshot_stem() -> str:
+        # Sharded replicas each own different targets, so each keeps its own snapshot
+        worker_id = os.getenv("WORKER_ID") or (socket.gethostname() if os.getenv("COORDINATOR_URL") else None)
+        return f"scanner-{worker_id}" if worker_id else "scanner"
+    
+    def snapshot_state(self) -> Dict[str, Any]:
+        # Every container is copied here, on the loop, because the write runs in a thread
+        # while polling keeps mutating the live ones
+        return {
+            "saved_at": time.time(),
+            "scan_count": self.scan_count,
+            "last_scan": self.last_scan.isoformat() if self.last_scan else None,
+            # Every recorded finding, so the restored list matches the rollups; gzip folds the
+            # copies re-reported each cycle
+            "findings": [vuln.to_dict() for vuln in self.vulnerabilities],
+            "stats": self.stats.to_snapshot(),
+            "feed_hashes": self.live_feed.finding_hashes(),
+            "alerts_sent": dict(self.alerts.sent) if self.alerts else {},
+            "last_pool_discovery": self.last_pool_discovery,
+            "pools": {pool_id: asdict(pool) for pool_id, pool in self.pools.items()},
+            "pool_vaults": dict(self.pool_vaults),
+            "mint_cache": self.mint_cache.to_snapshot(),
+            "reported_mints": {key: digest.hex() for key, digest in self.reported_mints.items()},
+            "scheduler": self.scheduler.to_snapshot() if self.scheduler else []
+        }
+    
+    def restore_state(self, state: Optional[Dict[str, Any]]) -> bool:
+        decoded = self.decode_state(state)
+        if decoded:
+            self.apply_state(decoded)
+        return decoded is not None
+    
+    def _read_state(self) -> Optional[Dict[str, Any]]:
+        return self.decode_state(read_snapshot(self.snapshot_path))
+    
+    def decode_state(self, state: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        # Builds fresh objects without touching the scanner, so it is safe in a thread. Everything
+        # is decoded before anything is applied: a bad snapshot leaves the scanner cold, not half restored
+        if not state:
+            return None
+        try:
+            return {
+                "vulnerabilities": [Vulnerability.from_dict(v) for v in state["findings"]],
+                "stats": StatsRollup.from_snapshot((severity.value for severity in SeverityLevel), state["stats"]),
+                "pools": {pool_id: PoolState(**pool) for pool_id, pool in state["pools"].items()},
+                "pool_vaults": {pool_id: (int(v0), int(v1)) for pool_id, (v0, v1) in state["pool_vaults"].items()},
+                "mint_cache": MintCache.from_snapshot(state["mint_cache"]),
+                "reported_mints": {key: bytes.fromhex(digest) for key, digest in state.get("reported_mints", {}).items()},
+                "activities": AdaptiveScheduler.activities_from_snapshot(state["scheduler"]) if self.scheduler else [],
+                "last_scan": datetime.fromisoformat(state["last_scan"]) if state["last_scan"] else None,
+                "feed_hashes": dict(state["feed_hashes"]),
+                "alerts_sent": {key: float(sent_at) for key, sent_at in state["alerts_sent"].items()},
+                "scan_count": int(state["scan_count"]),
+                "saved_at": float(state["saved_at"]),
+                "last_pool_discovery": state["last_pool_discovery"]
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Snapshot could not be restored, starting cold: {e}")
+            return None
+    
+    def apply_state(self, decoded: Dict[str, Any]):
+        self.vulnerabilities = decoded["vulnerabilities"]
+        self.stats = decoded["stats"]
+        self.scan_count = decoded["scan_count"]
+        self.last_scan = decoded["last_scan"]
+        self.live_feed.restore_finding_hashes(decoded["feed_hashes"])
+        if self.alerts:
+            self.alerts.sent.update(decoded["alerts_sent"])
+        self.pools = decoded["pools"]
+        self.last_pool_discovery = decoded["last_pool_discovery"]
+        self.pool_vaults = decoded["pool_vaults"]
+        for pool_id, vaults in self.pool_vaults.items():
+            pool = self.pools.get(pool_id)
+            if pool:
+                reserve_0, reserve_1 = pool.vault_amount_without_fee(*vaults)
+                self.price_graph.update_pool(pool_id, pool.token_0_mint, pool.token_1_mint, reserve_0, reserve_1)
+        self.mint_cache = decoded["mint_cache"]
+        self.reported_mints = decoded["reported_mints"]
+        if self.scheduler:
+            self.scheduler.load(decoded["activities"])
+        age = time.time() - decoded["saved_at"]
+        logger.info(
+            f"Restored snapshot from {age:.0f}s ago: {len(self.vulnerabilities)} findings, {len(self.pools)} pools",
+            extra={"snapshot_age_seconds": round(age)}
+        )
+    
+    async def save_snapshot(self):
+        # State is captured on the loop; compression and the write happen off it
+        state = self.snapshot_state()
+        try:
+            size = await asyncio.to_thread(write_snapshot, self.snapshot_path, state)
+            logger.info(f"Snapshot written to {self.snapshot_path} ({size} bytes)")
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error writing snapshot: {e}")
+        self.last_snapshot = time.monotonic()
+    
+    def _owns(self, key: str) -> bool:
+        return self.shard is None or self.shard.owns(key)
+    
+    def status_snapshot(self) -> Dict[str, Any]:
+        return {
+            "is_active": self.is_running,
+            "uptime_seconds": int((datetime.now() - self.started_at).total_seconds()) if self.started_at else 0,
+            "last_scan": self.last_scan.isoformat() if self.last_scan else None,
+            "total_scans": self.scan_count,
+            "total_vulnerabilities": len(self.vulnerabilities),
+            "scan_interval": self.scan_interval,
+            "adaptive_polling": self.scheduler.stats() if self.scheduler else None
+        }
+    
+    def _publish_updates(self, vulnerabilities: List[Vulnerability]):
+        for vuln in vulnerabilities:
+            self.live_feed.publish_finding(vuln.to_dict())
+        self.live_feed.publish_status(self.status_snapshot())
+    
     async def continuous_scan(self):
         logger.info("Starting continuous vulnerability scanning...")
         self.is_running = True
+        self.started_at = datetime.now()
+        self.live_feed.publish_status(self.status_snapshot())
         
         target_contracts = [
-            os.getenv("CP_SWAP_PROGRAM_ID", "CPMMoo8L3F4NbTegBCKVNunggL7H1ZpdTHKxQB5qKP1C"),
+            self.program_id,
         ]
         
         while self.is_running:
             try:
                 logger.info("Starting scan cycle...")
                 scan_results = []
+                self.valuation.begin_cycle()
                 
-                for contract in target_contracts:
+                for contract in filter(self._owns, target_contracts):
                     logger.info(f"Scanning contract: {contract}")
-                    contract_vulns = await self.scan_smart_contract(contract)
+                    with self.tracer.span("target.contract", target=contract):
+                        contract_vulns = await self.scan_smart_contract(contract)
                     scan_results.extend(contract_vulns)
                 
-                immunefi_vulns = await self.scan_immunefi_bounties()
-                scan_results.extend(immunefi_vulns)
+                with self.tracer.span("target.discover_pools"):
+                    pools = await self.discover_pools()
+                pools = {pool_id: pool for pool_id, pool in pools.items() if self._owns(pool_id)}
+                if pools and self.scheduler and not self.poll_task:
+                    self.poll_task = asyncio.create_task(self.adaptive_poll_loop())
+                if pools and not self.scheduler:
+                    with self.tracer.span("persist.observations", pools=len(pools)):
+                        await self.poll_pools(list(pools))
+                if pools:
+                    with self.tracer.span("check.pool_mints", pools=len(pools)):
+                        scan_results.extend(await self.scan_pool_mints(pools))
+                    with self.tracer.span("check.price_graph"):
+                        scan_results.extend(self.scan_price_graph())
+                
+                if self._owns("immunefi"):
+                    with self.tracer.span("target.immunefi"):
+                        immunefi_vulns = await self.scan_immunefi_bounties()
+                    scan_results.extend(immunefi_vulns)
                 
                 if scan_results:
                     logger.warning(f"Found {len(scan_results)} potential vulnerabilities!")
                     for vuln in scan_results:
-                        logger.warning(f"  {vuln.severity.value}: {vuln.title}")
+                        logger.warning(
+                            f"  {vuln.severity.value}: {vuln.title}",
+                            extra={"severity": vuln.severity.value, "contract_address": vuln.contract_address}
+                        )
                     
-                    self.vulnerabilities.extend(scan_results)
-                    await self._save_vulnerabilities(scan_results)
+                    self.record_findings(scan_results)
+                    with self.tracer.span("persist.findings", count=len(scan_results)):
+                        await self._save_vulnerabilities(scan_results)
                     await self._alert_critical_vulnerabilities(scan_results)
                 else:
                     logger.info("No vulnerabilities found in this scan cycle")
                 
                 self.last_scan = datetime.now()
+                self.scan_count += 1
+                with self.tracer.span("serialize.live_feed", count=len(scan_results)):
+                    self._publish_updates(scan_results)
+                self.live_feed.publish({
+                    "type": "scan_completed",
+                    "scan_data": {
+                        "total_scans": self.scan_count,
+                        "findings": len(scan_results),
+                        "completed_at": self.last_scan.isoformat()
+                    }
+                })
+                if self.snapshot_interval > 0 and time.monotonic() - self.last_snapshot >= self.snapshot_interval:
+                    with self.tracer.span("persist.snapshot"):
+                        await self.save_snapshot()
+                trace_events = self.tracer.end_cycle()
+                if trace_events:
+                    trace_path = await asyncio.to_thread(self.tracer.export_cycle, trace_events, self.trace_dir, self.scan_count)
+                    logger.info(f"Cycle trace written to {trace_path}")
                 logger.info(f"Scan completed. Next scan in {self.scan_interval} seconds...")
                 await asyncio.sleep(self.scan_interval)
                 
@@ -326,18 +844,30 @@ class VulnerabilityScanner:
     
     async def _alert_critical_vulnerabilities(self, vulnerabilities: List[Vulnerability]):
         critical_vulns = [v for v in vulnerabilities if v.severity == SeverityLevel.CRITICAL]
+        if critical_vulns and self.alerts:
+            self.alerts.submit([v.to_dict() for v in critical_vulns])
         if critical_vulns:
             for vuln in critical_vulns:
-                logger.critical(f"CRITICAL VULNERABILITY FOUND: {vuln.title}")
-                logger.critical(f"  Description: {vuln.description}")
-                logger.critical(f"  Bounty: ${vuln.bounty_min:,} - ${vuln.bounty_max:,}")
-                logger.critical(f"  Contract: {vuln.contract_address}")
+                logger.critical(
+                    f"CRITICAL VULNERABILITY FOUND: {vuln.title}",
+                    extra={
+                        "description": vuln.description,
+                        "bounty_min": vuln.bounty_min,
+                        "bounty_max": vuln.bounty_max,
+                        "contract_address": vuln.contract_address
+                    }
+                )
     
     def stop(self):
         logger.info("Stopping vulnerability scanner...")
         self.is_running = False
+        if self.poll_task:
+            self.poll_task.cancel()
+            self.poll_task = None
+        self.live_feed.publish_status(self.status_snapshot())
 
 async def main():
+    configure_logging()
     scanner = VulnerabilityScanner(scan_interval=300)  # 5 minute intervals
     
     try:
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import fcntl
+import gzip
+import itertools
+import json
+import logging
+import os
+import secrets
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+
+# Lock files of the slots this process holds, kept open for its lifetime
+_claimed_slots: List[IO] = []
+
+def claim_snapshot_path(directory: Path, stem: str) -> Path:
+    # Processes sharing a directory, such as uvicorn workers, each hold an flock on their
+    # own slot, so no two write the same file. The lock goes away with the process and a
+    # restarted one takes over the free slot, snapshot included
+    directory.mkdir(parents=True, exist_ok=True)
+    for slot in itertools.count():
+        name = stem if slot == 0 else f"{stem}-{slot}"
+        lock = open(directory / f"{name}.lock", "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            continue
+        _claimed_slots.append(lock)
+        return directory / f"{name}.json.gz"
+
+def write_snapshot(path: Path, state: Dict[str, Any]) -> int:
+    # Written beside the target and renamed over it, so a crash mid-write leaves the
+    # previous snapshot intact and readers never see a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = gzip.compress(
+        json.dumps({"version": SNAPSHOT_VERSION, **state}, separators=(",", ":")).encode(),
+        compresslevel=5
+    )
+    # Unique per write, so a second process pointed at the same path never truncates ours
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+    return len(payload)
+
+def read_snapshot(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    try:
+        state = json.loads(gzip.decompress(path.read_bytes()))
+    except (OSError, EOFError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    if not isinstance(state, dict) or state.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring snapshot {path} with unsupported version")
+        return None
+    return state
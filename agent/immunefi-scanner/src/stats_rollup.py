@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+# Bucket width in seconds and how many buckets each ring keeps
+RESOLUTIONS = {
+    "minute": (60, 24 * 60),
+    "hour": (3600, 30 * 24),
+    "day": (86400, 365),
+}
+
+class BucketRing:
+    # Fixed-size ring indexed by bucket number modulo size; a slot whose stored bucket
+    # number is stale is cleared the first time it is reused, so nothing ever scans the ring
+    def __init__(self, width: int, size: int, keys: List[str]):
+        self.width = width
+        self.size = size
+        self.keys = keys
+        self.buckets = [-1] * size
+        self.counts = [[0] * len(keys) for _ in range(size)]
+        self.bounty = [0] * size
+
+    def add(self, timestamp: float, key_index: int, bounty_max: int):
+        bucket = int(timestamp // self.width)
+        slot = bucket % self.size
+        if self.buckets[slot] != bucket:
+            if self.buckets[slot] > bucket:
+                return
+            self.buckets[slot] = bucket
+            self.counts[slot] = [0] * len(self.keys)
+            self.bounty[slot] = 0
+        self.counts[slot][key_index] += 1
+        self.bounty[slot] += bounty_max
+
+    def series(self, now: float, limit: int) -> List[Dict[str, object]]:
+        # Oldest first, zero-filled, ending with the bucket that contains `now`
+        current = int(now // self.width)
+        points = []
+        for bucket in range(current - min(limit, self.size) + 1, current + 1):
+            slot = bucket % self.size
+            live = self.buckets[slot] == bucket
+            counts = self.counts[slot] if live else [0] * len(self.keys)
+            points.append({
+                "start": datetime.fromtimestamp(bucket * self.width, tz=timezone.utc).isoformat(),
+                "total": sum(counts),
+                "by_severity": dict(zip(self.keys, counts)),
+                "bounty_potential": self.bounty[slot] if live else 0
+            })
+        return points
+
+class StatsRollup:
+    # Running totals plus per-minute/hour/day rings, all updated as findings are recorded.
+    # `version` changes exactly when recorded data does and is the basis for ETags.
+    def __init__(self, severities: Iterable[str], resolutions: Dict[str, tuple] = RESOLUTIONS):
+        self.severities = list(severities)
+        self.index = {severity: i for i, severity in enumerate(self.severities)}
+        self.rings = {name: BucketRing(width, size, self.severities) for name, (width, size) in resolutions.items()}
+        self.counts = dict.fromkeys(self.severities, 0)
+        self.bounty = dict.fromkeys(self.severities, 0)
+        self.version = 0
+
+    def record(self, severity: str, bounty_max: int, timestamp: Optional[float] = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        key_index = self.index[severity]
+        self.counts[severity] += 1
+        self.bounty[severity] += bounty_max
+        for ring in self.rings.values():
+            ring.add(timestamp, key_index, bounty_max)
+        self.version += 1
+
+    def totals(self) -> Dict[str, object]:
+        return {
+            "total_vulnerabilities": sum(self.counts.values()),
+            "severity_breakdown": dict(self.counts),
+            "total_bounty_potential": sum(self.bounty.values())
+        }
+
+    def timeseries(self, resolution: str, limit: Optional[int] = None, now: Optional[float] = None) -> Dict[str, object]:
+        ring = self.rings[resolution]
+        now = time.time() if now is None else now
+        limit = ring.size if limit is None else max(1, min(limit, ring.size))
+        return {
+            "resolution": resolution,
+            "bucket_seconds": ring.width,
+            "points": ring.series(now, limit)
+        }
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {
+            "counts": dict(self.counts),
+            "bounty": dict(self.bounty),
+            "rings": {
+                name: {
+                    "buckets": list(ring.buckets),
+                    "counts": [list(counts) for counts in ring.counts],
+                    "bounty": list(ring.bounty)
+                }
+                for name, ring in self.rings.items()
+            }
+        }
+
+    @classmethod
+    def from_snapshot(cls, severities: Iterable[str], data: Dict[str, Any]) -> "StatsRollup":
+        rollup = cls(severities)
+        for severity in rollup.severities:
+            rollup.counts[severity] = int(data["counts"].get(severity, 0))
+            rollup.bounty[severity] = int(data["bounty"].get(severity, 0))
+        for name, ring in rollup.rings.items():
+            saved = data["rings"].get(name)
+            # A ring saved with a different size or severity set cannot be mapped slot for slot
+            if not saved or len(saved["buckets"]) != ring.size or any(len(c) != len(ring.keys) for c in saved["counts"]):
+                continue
+            ring.buckets = [int(b) for b in saved["buckets"]]
+            ring.counts = [[int(c) for c in counts] for counts in saved["counts"]]
+            ring.bounty = [int(b) for b in saved["bounty"]]
+        rollup.version = sum(rollup.counts.values())
+        return rollup
+
+    def current_bucket(self, resolution: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        return int(now // self.rings[resolution].width)
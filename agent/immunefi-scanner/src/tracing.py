@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import asyncio
+import collections
+import json
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_NOOP = nullcontext()
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self.name, self.start, end, self.args)
+        return False
+
+class Tracer:
+    def __init__(self, enabled: bool = False, keep_cycles: int = 5):
+        self.enabled = enabled
+        self.cycles: Deque[List[Dict[str, Any]]] = collections.deque(maxlen=keep_cycles)
+        self._events: List[Dict[str, Any]] = []
+        self._task_ids: Dict[int, int] = {}
+        self._origin = time.perf_counter()
+
+    def span(self, name: str, **args):
+        # Disabled tracing costs one attribute check and returns a shared no-op context
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, args)
+
+    def _tid(self) -> int:
+        # Concurrent tasks get their own Chrome trace row so spans nest correctly
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = id(task) if task else 0
+        return self._task_ids.setdefault(key, len(self._task_ids))
+
+    def _record(self, name: str, start: float, end: float, args: Dict[str, Any]):
+        self._events.append({
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": round((start - self._origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": 1,
+            "tid": self._tid(),
+            "args": args
+        })
+
+    def end_cycle(self) -> Optional[List[Dict[str, Any]]]:
+        if not self.enabled or not self._events:
+            return None
+        events, self._events = self._events, []
+        self._task_ids = {}
+        self.cycles.append(events)
+        return events
+
+    def export_cycle(self, events: List[Dict[str, Any]], export_dir: Path, cycle: int = 0) -> Path:
+        # Blocking file IO: the scanner runs this through asyncio.to_thread
+        export_dir.mkdir(parents=True, exist_ok=True)
+        path = export_dir / f"cycle_{cycle:06d}.json"
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(events), f)
+        return path
+
+    def chrome_trace(self, events: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        if events is None:
+            events = self.cycles[-1] if self.cycles else []
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+class LoopWatchdog:
+    # A helper thread pings the event loop; when the loop fails to answer within the
+    # threshold, whatever callback is blocking it is still on the stack and is captured
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float = 0.1, interval: float = 0.05):
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = interval
+        self.loop_thread_id = threading.get_ident()
+        self.slow_callbacks = 0
+        self._pong = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _mark_alive(self):
+        self._pong = time.monotonic()
+
+    def _watch(self):
+        reported = False
+        while not self._stop.wait(self.interval):
+            try:
+                self.loop.call_soon_threadsafe(self._mark_alive)
+            except RuntimeError:
+                return
+            stalled = time.monotonic() - self._pong
+            if stalled > self.threshold + self.interval and not reported:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+                self.slow_callbacks += 1
+                reported = True
+                logger.warning(
+                    f"Event loop blocked for over {stalled * 1000:.0f}ms",
+                    extra={"stalled_ms": round(stalled * 1000), "stack": stack}
+                )
+            elif stalled <= self.threshold:
+                reported = False
+
+def sample_profile(seconds: float, interval: float = 0.005, thread_id: Optional[int] = None) -> Dict[str, int]:
+    # Collapsed-stack output ("outer;inner count"), the input format of flamegraph.pl and speedscope
+    stacks: Dict[str, int] = collections.Counter()
+    own_id = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own_id or (thread_id is not None and ident != thread_id):
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stacks[";".join(reversed(names))] += 1
+        time.sleep(interval)
+    return dict(stacks)
+
+def collapsed_stacks(stacks: Dict[str, int]) -> str:
+    return "\n".join(f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda s: -s[1]))
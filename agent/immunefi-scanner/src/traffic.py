@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import gzip
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Corpus format: gzip-compressed JSON lines, one exchange per line
+# {"method", "path", "body", "status", "response", "latency"}
+
+def request_key(method: str, path: str, body: Any) -> str:
+    # JSON-RPC ids change per call and must not affect matching
+    if isinstance(body, dict):
+        body = {k: v for k, v in body.items() if k != "id"}
+    return f"{method.upper()} {path} {json.dumps(body, sort_keys=True)}"
+
+def rpc_method(body: Any) -> Optional[str]:
+    return body.get("method") if isinstance(body, dict) else None
+
+def load_corpus(path: Path) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class RecordedResponse:
+    def __init__(self, status: int, payload: Any):
+        self.status = status
+        self._payload = payload
+
+    async def json(self, **kwargs) -> Any:
+        return self._payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+class _PendingExchange:
+    def __init__(self, recorder: "RecordingSession", method: str, url: str, body: Any):
+        self.recorder = recorder
+        self.method = method
+        self.url = url
+        self.body = body
+
+    async def __aenter__(self) -> RecordedResponse:
+        started = time.perf_counter()
+        async with self.recorder.session.request(self.method, self.url, json=self.body) as response:
+            try:
+                payload = await response.json(content_type=None)
+            except (aiohttp.ContentTypeError, json.JSONDecodeError):
+                payload = None
+            status = response.status
+        self.recorder.record(self.method, self.url, self.body, status, payload, time.perf_counter() - started)
+        return RecordedResponse(status, payload)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+# Drop-in for the subset of aiohttp.ClientSession the scanner uses
+class RecordingSession:
+    def __init__(self, session: aiohttp.ClientSession, corpus_path: Path):
+        self.session = session
+        self.corpus_path = corpus_path
+        self.corpus_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(corpus_path, "at")
+        self.recorded = 0
+
+    def post(self, url: str, json: Any = None, **kwargs) -> _PendingExchange:
+        return _PendingExchange(self, "POST", url, json)
+
+    def get(self, url: str, **kwargs) -> _PendingExchange:
+        return _PendingExchange(self, "GET", url, None)
+
+    def record(self, method: str, url: str, body: Any, status: int, payload: Any, latency: float):
+        exchange = {
+            "method": method,
+            "path": urlsplit(url).path or "/",
+            "body": body,
+            "status": status,
+            "response": payload,
+            "latency": round(latency, 6)
+        }
+        self._file.write(json.dumps(exchange) + "\n")
+        self.recorded += 1
+
+    async def close(self):
+        self._file.close()
+        logger.info(f"Recorded {self.recorded} exchanges to {self.corpus_path}")
+        await self.session.close()
+
+class TrafficIndex:
+    def __init__(self, exchanges: List[Dict[str, Any]]):
+        self.exact: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_rpc_method: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        for exchange in exchanges:
+            self.exact.setdefault(request_key(exchange["method"], exchange["path"], exchange["body"]), []).append(exchange)
+            method = rpc_method(exchange["body"])
+            if method:
+                self.by_rpc_method.setdefault(method, []).append(exchange)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "TrafficIndex":
+        return cls(list(load_corpus(path)))
+
+    def lookup(self, method: str, path: str, body: Any) -> Optional[Dict[str, Any]]:
+        # Exact match first, cycling through repeated recordings; otherwise any recording
+        # of the same RPC method so synthetic targets still get realistic payloads
+        key = request_key(method, path, body)
+        candidates = self.exact.get(key)
+        if not candidates:
+            key = f"rpc:{rpc_method(body)}"
+            candidates = self.by_rpc_method.get(rpc_method(body) or "")
+        if not candidates:
+            return None
+        index = self._cursor.get(key, 0)
+        self._cursor[key] = index + 1
+        return candidates[index % len(candidates)]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from mint_extensions import USDC_MINT
+from pool_state import PoolState
+from price_graph import PAIR_MASK, PAIR_SHIFT, PriceGraph
+
+logger = logging.getLogger(__name__)
+
+class FundsAtRiskEstimator:
+    # Prices every mint in the quote mint by walking the price graph outward from the
+    # quote, up to max_hops, taking the liquidity-weighted mean of the routes at each hop.
+    # Results are cached until the next begin_cycle().
+    def __init__(self, price_graph: PriceGraph, quote_mint: str = USDC_MINT, quote_decimals: int = 6, max_hops: int = 3):
+        self.price_graph = price_graph
+        self.quote_mint = quote_mint
+        self.quote_decimals = quote_decimals
+        self.max_hops = max_hops
+        self.cycle = 0
+        self._prices: Optional[Dict[str, float]] = None
+        self._pool_values: Dict[str, Optional[float]] = {}
+
+    def begin_cycle(self):
+        self.cycle += 1
+        self._prices = None
+        self._pool_values = {}
+
+    def mint_prices(self) -> Dict[str, float]:
+        # Raw quote units per raw mint unit, so mint decimals cancel when valuing reserves
+        if self._prices is not None:
+            return self._prices
+        graph = self.price_graph
+        quote = graph.mint_index.get(self.quote_mint)
+        if quote is None:
+            self._prices = {}
+            return self._prices
+
+        keys, pair_w, pair_wl = graph.pair_table()
+        src, dst = keys >> PAIR_SHIFT, keys & PAIR_MASK
+        n = max(len(graph.mints), 1)
+        log_price = np.full(n, np.nan)
+        log_price[quote] = 0.0
+        for _ in range(self.max_hops):
+            # Pairs from an unpriced mint into a priced one extend the priced set by one hop
+            usable = np.isnan(log_price[src]) & ~np.isnan(log_price[dst])
+            if not usable.any():
+                break
+            candidate = pair_wl[usable] / pair_w[usable] + log_price[dst[usable]]
+            weight = pair_w[usable]
+            total_w = np.bincount(src[usable], weights=weight, minlength=n)
+            total_wl = np.bincount(src[usable], weights=weight * candidate, minlength=n)
+            priced = total_w > 0
+            log_price[priced] = total_wl[priced] / total_w[priced]
+
+        self._prices = {
+            graph.mints[i]: float(np.exp(log_price[i]))
+            for i in np.flatnonzero(~np.isnan(log_price[:len(graph.mints)]))
+        }
+        return self._prices
+
+    def pool_value(self, pool_id: str, pool: PoolState, vaults: Optional[Tuple[int, int]]) -> Optional[float]:
+        if pool_id in self._pool_values:
+            return self._pool_values[pool_id]
+        value = None
+        if vaults:
+            prices = self.mint_prices()
+            price_0 = prices.get(pool.token_0_mint)
+            price_1 = prices.get(pool.token_1_mint)
+            reserve_0, reserve_1 = pool.vault_amount_without_fee(*vaults)
+            # One side priced is enough: a constant-product pool holds equal value on both sides
+            if price_0 is not None and price_1 is not None:
+                value = reserve_0 * price_0 + reserve_1 * price_1
+            elif price_0 is not None:
+                value = 2 * reserve_0 * price_0
+            elif price_1 is not None:
+                value = 2 * reserve_1 * price_1
+            if value is not None:
+                value /= 10 ** self.quote_decimals
+        self._pool_values[pool_id] = value
+        return value
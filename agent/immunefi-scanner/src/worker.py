@@ -2,29 +2,21 @@
 
 import asyncio
 import signal
-import sys
 import logging
 import os
-from datetime import datetime
-from pathlib import Path
 from typing import Optional
 
 from scanner import VulnerabilityScanner
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/worker.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from coordination import ShardManager, create_coordinator
+from logging_setup import configure_logging
 
 logger = logging.getLogger(__name__)
 
 class GorbaganaWorker:
     def __init__(self):
         self.scanner: Optional[VulnerabilityScanner] = None
+        self.shard: Optional[ShardManager] = None
+        self.shard_task: Optional[asyncio.Task] = None
         self.is_running = False
         self.shutdown_event = asyncio.Event()
         
@@ -38,6 +30,22 @@ class GorbaganaWorker:
         scan_interval = int(os.getenv("SCAN_INTERVAL", "300"))
         self.scanner = VulnerabilityScanner(scan_interval=scan_interval)
         
+        coordinator_url = os.getenv("COORDINATOR_URL")
+        if coordinator_url:
+            self.shard = ShardManager(
+                create_coordinator(coordinator_url),
+                worker_id=os.getenv("WORKER_ID"),
+                lease_ttl=float(os.getenv("WORKER_LEASE_TTL", "30"))
+            )
+            try:
+                await self.shard.join()
+            except Exception as e:
+                logger.error(f"❌ Could not join coordinator at startup, refusing to run unsharded: {e}")
+                raise
+            self.shard_task = asyncio.create_task(self.shard.run())
+            self.scanner.shard = self.shard
+            logger.info(f"🧩 Sharding targets as {self.shard.worker_id} across {len(self.shard.ring.members)} workers")
+        
         try:
             async with self.scanner:
                 logger.info("🔍 Continuous vulnerability scanning initiated...")
@@ -55,6 +63,10 @@ class GorbaganaWorker:
         logger.info("🛑 Shutdown signal received...")
         if self.scanner:
             self.scanner.stop()
+        if self.shard_task:
+            self.shard_task.cancel()
+            self.shard_task = None
+            await self.shard.leave()
         self.shutdown_event.set()
         self.is_running = False
 
@@ -67,8 +79,7 @@ async def signal_handler(worker: GorbaganaWorker):
     signal.signal(signal.SIGTERM, handle_signal)
 
 async def main():
-    logs_dir = Path("logs")
-    logs_dir.mkdir(exist_ok=True)
+    configure_logging(log_file="logs/worker.log")
     
     worker = GorbaganaWorker()
     
@@ -0,0 +1,134 @@
+import asyncio
+import struct
+import time
+
+from adaptive_scheduler import AdaptiveScheduler, RpcBudget
+from pool_state import (
+    DISCRIMINATOR_LEN,
+    OBSERVATION_RING_SPAN,
+    OBSERVATION_STATE_LEN,
+    POOL_STATE_LEN,
+    TOKEN_ACCOUNT_AMOUNT_OFFSET,
+    PoolState,
+)
+from scanner import VulnerabilityScanner
+from traffic import RecordedResponse
+
+KEYS = [bytes([i + 1]) * 32 for i in range(10)]
+
+def pool_account(epoch=7):
+    data = bytearray(POOL_STATE_LEN)
+    offset = DISCRIMINATOR_LEN
+    for key in KEYS:
+        data[offset:offset + 32] = key
+        offset += 32
+    data[offset:offset + 5] = bytes([255, 0, 9, 9, 6])
+    struct.pack_into("<QQQQQQQ", data, offset + 5, 1000, 0, 0, 0, 0, 0, epoch)
+    return bytes(data)
+
+def token_account(amount):
+    data = bytearray(165)
+    struct.pack_into("<Q", data, TOKEN_ACCOUNT_AMOUNT_OFFSET, amount)
+    return bytes(data)
+
+def observation_account(index=42):
+    data = bytearray(OBSERVATION_STATE_LEN)
+    struct.pack_into("<?H", data, DISCRIMINATOR_LEN, True, index)
+    return bytes(data)
+
+def make_scanner(monkeypatch, tmp_path):
+    monkeypatch.setenv("ADAPTIVE_POLLING", "true")
+    monkeypatch.setenv("SNAPSHOT_INTERVAL", "0")
+    scanner = VulnerabilityScanner(scan_interval=1012)
+    scanner.observation_archive.root = tmp_path
+    pool = PoolState.from_account_data(pool_account())
+    scanner.pools = {"pool": pool}
+    scanner.scheduler.track(["pool"], now=0.0)
+    healthy = {
+        "pool": pool_account(),
+        pool.token_0_vault: token_account(5_000),
+        pool.token_1_vault: token_account(9_000),
+        pool.observation_key: observation_account(),
+    }
+    return scanner, healthy
+
+def test_rpc_failure_does_not_speed_up_idle_pool(monkeypatch, tmp_path):
+    scanner, healthy = make_scanner(monkeypatch, tmp_path)
+    responses = [healthy, {key: None for key in healthy}, healthy]
+
+    async def fetch(addresses):
+        return responses.pop(0)
+
+    monkeypatch.setattr(scanner, "_fetch_multiple_accounts", fetch)
+
+    async def run():
+        intervals = []
+        for _ in range(3):
+            assert await scanner.poll_pools(["pool"]) == 0
+            intervals.append(scanner.scheduler.pools["pool"].interval)
+        return intervals
+
+    intervals = asyncio.run(run())
+    assert intervals == sorted(intervals)
+    assert intervals[0] >= 1012
+
+def test_unobserved_pools_are_requeued(monkeypatch, tmp_path):
+    scanner, healthy = make_scanner(monkeypatch, tmp_path)
+
+    async def fetch(addresses):
+        # Rediscovery swaps the pool set while the batch is in flight
+        scanner.pools = {}
+        raise RuntimeError("rpc down")
+
+    monkeypatch.setattr(scanner, "_fetch_multiple_accounts", fetch)
+    scheduler = scanner.scheduler
+    due = scheduler.due(now=2000.0)
+    assert due == ["pool"]
+
+    async def run():
+        try:
+            await scanner.poll_pools(due)
+        except RuntimeError:
+            pass
+        finally:
+            scheduler.requeue(due, now=2000.0)
+
+    asyncio.run(run())
+    assert scheduler.due(now=2000.0 + 1012 + 1) == ["pool"]
+
+def test_max_interval_stays_inside_the_oracle_ring(monkeypatch, tmp_path):
+    monkeypatch.setenv("ADAPTIVE_MAX_INTERVAL", "14400")
+    scanner, _ = make_scanner(monkeypatch, tmp_path)
+    assert scanner.scheduler.max_interval < OBSERVATION_RING_SPAN
+    assert scanner.scheduler.initial_interval <= scanner.scheduler.max_interval
+
+def test_polling_waits_for_budget_spent_elsewhere():
+    budget = RpcBudget(rate=1.0, burst=2.0)
+    scheduler = AdaptiveScheduler(initial_interval=10.0, poll_cost=0.04, budget=budget)
+    start = time.monotonic()
+    scheduler.track([f"pool-{i}" for i in range(50)], now=start)
+    # Discovery and contract checks drained the bucket
+    budget.charge(2, now=start + 100)
+    assert scheduler.due(now=start + 100) == []
+    # One request's worth of budget covers a 25-pool batch, not 50 separate polls
+    assert len(scheduler.due(now=start + 101)) == 25
+
+def test_every_batch_costs_at_least_one_request():
+    scheduler = AdaptiveScheduler(rpc_budget=0.5, initial_interval=5.0, poll_cost=0.04)
+    scheduler.track(["pool"], now=0.0)
+    # One pool every 5s is 0.2 requests/sec, not 0.008
+    assert scheduler.projected_rps() == 0.2
+    scheduler.track([f"pool-{i}" for i in range(100)], now=0.0)
+    assert scheduler.projected_rps() == 1.0
+    assert scheduler.budget_scale() == 2.0
+
+def test_every_request_sent_is_charged(monkeypatch, tmp_path):
+    scanner, _ = make_scanner(monkeypatch, tmp_path)
+
+    class Session:
+        def post(self, url, json=None):
+            return RecordedResponse(200, {"result": {"value": [None] * len(json["params"][0])}})
+
+    scanner.session = Session()
+    asyncio.run(scanner._fetch_multiple_accounts([f"account-{i}" for i in range(250)]))
+    assert scanner.rpc_budget.spent == 3
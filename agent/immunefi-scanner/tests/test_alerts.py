@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from alerts import AlertDispatcher, WebhookSink
+
+def finding(target, title, bounty_max=50000):
+    return {"contract_address": target, "title": title, "description": title, "bounty_max": bounty_max}
+
+class StubSink:
+    # Local aiohttp.web webhook receiver; the first `fail_first` posts answer 503
+    def __init__(self, fail_first=0, delay=0.0):
+        self.fail_first = fail_first
+        self.delay = delay
+        self.attempts = 0
+        self.digests = []
+        self.runner = None
+        self.url = None
+
+    async def handle(self, request):
+        self.attempts += 1
+        body = await request.json()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.attempts <= self.fail_first:
+            return web.Response(status=503)
+        self.digests.append(body)
+        return web.json_response({"ok": True})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/hook", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/hook"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+def run_with_stub(test, **stub_args):
+    async def run():
+        stub = StubSink(**stub_args)
+        await stub.start()
+        try:
+            await test(stub)
+        finally:
+            await stub.stop()
+    asyncio.run(run())
+
+def test_window_coalesces_one_digest_per_target():
+    async def test(stub):
+        dispatcher = AlertDispatcher([WebhookSink(stub.url)], window=0.1)
+        dispatcher.start()
+        dispatcher.submit([finding("pool-a", "Reentrancy"), finding("pool-a", "Oracle"), finding("pool-b", "Reentrancy")])
+        dispatcher.submit([finding("pool-a", "Reentrancy")])
+        await wait_for(lambda: len(stub.digests) == 2)
+        await dispatcher.stop()
+        digests = {d["target"]: d for d in stub.digests}
+        assert digests["pool-a"]["count"] == 2
+        assert sorted(f["title"] for f in digests["pool-a"]["findings"]) == ["Oracle", "Reentrancy"]
+        assert digests["pool-a"]["total_bounty_max"] == 100000
+        assert digests["pool-b"]["count"] == 1
+    run_with_stub(test)
+
+def test_resubmitted_finding_is_not_realerted():
+    async def test(stub):
+        dispatcher = AlertDispatcher([WebhookSink(stub.url)], window=0.05)
+        dispatcher.start()
+        dispatcher.submit([finding("pool-a", "Reentrancy")])
+        await wait_for(lambda: len(stub.digests) == 1)
+        dispatcher.submit([finding("pool-a", "Reentrancy")])
+        await asyncio.sleep(0.3)
+        await dispatcher.stop()
+        assert len(stub.digests) == 1
+        assert stub.attempts == 1
+    run_with_stub(test)
+
+def test_retries_after_server_error():
+    async def test(stub):
+        dispatcher = AlertDispatcher([WebhookSink(stub.url)], window=0.05, retry_delay=0.01)
+        dispatcher.start()
+        dispatcher.submit([finding("pool-a", "Reentrancy")])
+        await wait_for(lambda: len(stub.digests) == 1)
+        await dispatcher.stop()
+        assert stub.attempts == 3
+        assert dispatcher.delivered == 1
+        assert dispatcher.failed == 0
+        assert "pool-a:Reentrancy" in dispatcher.sent
+    run_with_stub(test, fail_first=2)
+
+def test_total_failure_keeps_finding_pending():
+    async def test(stub):
+        dispatcher = AlertDispatcher([WebhookSink(stub.url)], window=0.05, max_retries=1, retry_delay=0.01)
+        dispatcher.start()
+        dispatcher.submit([finding("pool-a", "Reentrancy")])
+        await wait_for(lambda: dispatcher.failed >= 1)
+        assert "pool-a:Reentrancy" not in dispatcher.sent
+        # The next window delivers it once the sink recovers
+        await wait_for(lambda: len(stub.digests) == 1)
+        await dispatcher.stop()
+        assert "pool-a:Reentrancy" in dispatcher.sent
+    run_with_stub(test, fail_first=2)
+
+def test_submit_never_awaits_a_sink():
+    async def test(stub):
+        dispatcher = AlertDispatcher([WebhookSink(stub.url)], window=0.01, rate_limit_per_minute=10000)
+        dispatcher.start()
+        assert not asyncio.iscoroutinefunction(dispatcher.submit)
+        # With a delivery stuck in the slow sink, submitting still returns immediately
+        dispatcher.submit([finding("pool-slow", "Reentrancy")])
+        await wait_for(lambda: stub.attempts == 1)
+        started = time.perf_counter()
+        for i in range(200):
+            dispatcher.submit([finding(f"pool-{i}", "Reentrancy")])
+        assert time.perf_counter() - started < 0.1
+        await dispatcher.stop()
+    run_with_stub(test, delay=0.5)
@@ -0,0 +1,17 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import api
+
+def test_bounty_batch_is_capped(monkeypatch):
+    monkeypatch.setattr(api, "MAX_BOUNTY_BATCH", 2)
+    items = [api.BountyItem(severity="High")] * 3
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(api.calculate_bounty_batch(api.BatchBountyRequest(items=items)))
+    assert error.value.status_code == 413
+
+    result = asyncio.run(api.calculate_bounty_batch(api.BatchBountyRequest(items=items[:2])))
+    assert len(result["results"]) == 2
+    assert result["results"][0]["funds_at_risk_scope"] is None
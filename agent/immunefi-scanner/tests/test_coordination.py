@@ -0,0 +1,111 @@
+import asyncio
+import base64
+
+import pytest
+
+from coordination import ShardManager, SQLiteCoordinator
+
+TARGETS = [f"pool-{i}" for i in range(300)]
+
+def owners(managers):
+    return {key: [m.worker_id for m in managers if m.owns(key)] for key in TARGETS}
+
+async def start_workers(path, count, lease_ttl=30.0):
+    managers = [ShardManager(SQLiteCoordinator(path), f"worker-{i}", lease_ttl) for i in range(count)]
+    for manager in managers:
+        await manager.join()
+    for manager in managers:
+        await manager.refresh()
+    return managers
+
+def test_targets_are_partitioned_without_overlap(tmp_path):
+    async def run():
+        managers = await start_workers(str(tmp_path / "coordinator.db"), 3)
+        assignment = owners(managers)
+        assert all(len(owned) == 1 for owned in assignment.values())
+        for manager in managers:
+            assert manager.ring.members == ["worker-0", "worker-1", "worker-2"]
+            assert manager.filter(TARGETS)
+    asyncio.run(run())
+
+def test_leave_reassigns_targets(tmp_path):
+    async def run():
+        managers = await start_workers(str(tmp_path / "coordinator.db"), 3)
+        before = owners(managers)
+        await managers[2].leave()
+        remaining = managers[:2]
+        for manager in remaining:
+            await manager.refresh()
+        after = owners(remaining)
+        assert all(len(owned) == 1 for owned in after.values())
+        # Consistent hashing: only the departed worker's keys move
+        for key, owned in before.items():
+            if owned != ["worker-2"]:
+                assert after[key] == owned
+    asyncio.run(run())
+
+def test_expired_lease_reassigns_targets(tmp_path):
+    async def run():
+        path = str(tmp_path / "coordinator.db")
+        survivor = ShardManager(SQLiteCoordinator(path), "worker-0", lease_ttl=30.0)
+        stale = ShardManager(SQLiteCoordinator(path), "worker-1", lease_ttl=0.2)
+        await survivor.join()
+        await stale.join()
+        assert (await survivor.refresh()) == ["worker-0", "worker-1"]
+        await asyncio.sleep(0.3)
+        assert (await survivor.refresh()) == ["worker-0"]
+        assert all(survivor.owns(key) for key in TARGETS)
+    asyncio.run(run())
+
+def test_join_fails_fast_when_coordinator_is_unreachable():
+    class BrokenCoordinator:
+        async def heartbeat(self, worker_id, ttl):
+            raise ConnectionError("coordinator down")
+
+    async def run():
+        manager = ShardManager(BrokenCoordinator(), "worker-0")
+        with pytest.raises(ConnectionError):
+            await manager.join()
+        # refresh, by contrast, tolerates outages and keeps the last ring
+        assert (await manager.refresh()) == ["worker-0"]
+    asyncio.run(run())
+
+def test_only_the_discovery_owner_lists_the_program(tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_INTERVAL", "0")
+    monkeypatch.delenv("CP_SWAP_POOLS", raising=False)
+    from coordination import DISCOVERY_KEY
+    from scanner import VulnerabilityScanner
+    from test_adaptive_polling import pool_account
+
+    async def run():
+        managers = await start_workers(str(tmp_path / "coordinator.db"), 3)
+        listings = []
+        fetched = {}
+        scanners = []
+        for manager in managers:
+            scanner = VulnerabilityScanner()
+            scanner.shard = manager
+
+            async def rpc_call(method, params, _id=manager.worker_id):
+                listings.append(_id)
+                return [{"pubkey": pool_id, "account": {"data": [base64.b64encode(pool_account()).decode()]}} for pool_id in TARGETS]
+
+            async def fetch(addresses, _id=manager.worker_id):
+                fetched[_id] = list(addresses)
+                return {address: pool_account() for address in addresses}
+
+            scanner._rpc_call = rpc_call
+            scanner._fetch_multiple_accounts = fetch
+            scanners.append(scanner)
+
+        owner = next(s for s in scanners if s.shard.owns(DISCOVERY_KEY))
+        others = [s for s in scanners if s is not owner]
+        # Before anything is published the other replicas wait instead of listing
+        assert await others[0].discover_pools() == {}
+        assert len((await owner.discover_pools())) == len(TARGETS)
+        for scanner in others:
+            await scanner.discover_pools()
+            assert sorted(scanner.pools) == sorted(scanner.shard.filter(TARGETS))
+        assert listings == [owner.shard.worker_id]
+        assert set(fetched) == {s.shard.worker_id for s in others}
+    asyncio.run(run())
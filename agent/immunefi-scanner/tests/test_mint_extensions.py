@@ -0,0 +1,139 @@
+import asyncio
+import struct
+
+from mint_extensions import (
+    ACCOUNT_TYPE_MINT,
+    ACCOUNT_TYPE_OFFSET,
+    EXTENSION_DEFAULT_ACCOUNT_STATE,
+    EXTENSION_MINT_CLOSE_AUTHORITY,
+    EXTENSION_PERMANENT_DELEGATE,
+    EXTENSION_TRANSFER_FEE_CONFIG,
+    EXTENSION_TRANSFER_HOOK,
+    TOKEN_2022_PROGRAM_ID,
+    TOKEN_PROGRAM_ID,
+    USDC_MINT,
+    MintInfo,
+    _iter_tlv,
+    assess_mint,
+)
+from pool_state import b58encode
+
+MINT_AUTHORITY = bytes([1]) * 32
+FREEZE_AUTHORITY = bytes([2]) * 32
+EXTENSION_AUTHORITY = bytes([3]) * 32
+HOOK_PROGRAM = bytes([4]) * 32
+
+def base_mint(freeze_authority=None, supply=1_000_000, decimals=6):
+    return struct.pack(
+        "<I32sQB?I32s",
+        1, MINT_AUTHORITY, supply, decimals, True,
+        1 if freeze_authority else 0, freeze_authority or bytes(32)
+    )
+
+def tlv(extension_type, value):
+    return struct.pack("<HH", extension_type, len(value)) + value
+
+def token_2022_mint(*extensions, freeze_authority=None):
+    data = base_mint(freeze_authority).ljust(ACCOUNT_TYPE_OFFSET, b"\0") + bytes([ACCOUNT_TYPE_MINT])
+    return data + b"".join(extensions)
+
+def transfer_fee_value(config_authority, older_bps, newer_bps):
+    return struct.pack(
+        "<32s32sQQQHQQH",
+        config_authority, bytes(32), 777,
+        10, 5_000, older_bps,
+        20, 9_000, newer_bps
+    )
+
+def test_iter_tlv_stops_at_zero_type_padding():
+    data = tlv(3, b"a" * 32) + tlv(12, b"b" * 32) + bytes(8)
+    entries = list(_iter_tlv(data, 0))
+    assert entries == [(3, b"a" * 32), (12, b"b" * 32)]
+
+def test_classic_mint_has_no_extensions():
+    info = MintInfo.from_account_data("mint", TOKEN_PROGRAM_ID, base_mint(FREEZE_AUTHORITY))
+    assert info.decimals == 6
+    assert info.supply == 1_000_000
+    assert info.mint_authority == b58encode(MINT_AUTHORITY)
+    assert info.freeze_authority == b58encode(FREEZE_AUTHORITY)
+    assert info.extension_types == []
+
+def test_uninitialized_or_short_mint_is_rejected():
+    uninitialized = bytearray(base_mint())
+    uninitialized[45] = 0
+    assert MintInfo.from_account_data("mint", TOKEN_PROGRAM_ID, bytes(uninitialized)) is None
+    assert MintInfo.from_account_data("mint", TOKEN_PROGRAM_ID, bytes(40)) is None
+
+def test_transfer_fee_config():
+    data = token_2022_mint(tlv(EXTENSION_TRANSFER_FEE_CONFIG, transfer_fee_value(EXTENSION_AUTHORITY, 100, 750)))
+    fee = MintInfo.from_account_data("mint", TOKEN_2022_PROGRAM_ID, data).transfer_fee
+    assert fee.config_authority == b58encode(EXTENSION_AUTHORITY)
+    assert fee.withdraw_withheld_authority is None
+    assert fee.withheld_amount == 777
+    assert (fee.older_basis_points, fee.older_maximum_fee) == (100, 5_000)
+    assert (fee.newer_epoch, fee.newer_basis_points, fee.newer_maximum_fee) == (20, 750, 9_000)
+    assert fee.max_basis_points == 750
+
+def test_transfer_hook():
+    data = token_2022_mint(tlv(EXTENSION_TRANSFER_HOOK, EXTENSION_AUTHORITY + HOOK_PROGRAM))
+    info = MintInfo.from_account_data("mint", TOKEN_2022_PROGRAM_ID, data)
+    assert info.transfer_hook_program == b58encode(HOOK_PROGRAM)
+
+def test_permanent_delegate_and_close_authority():
+    data = token_2022_mint(
+        tlv(EXTENSION_MINT_CLOSE_AUTHORITY, EXTENSION_AUTHORITY),
+        tlv(EXTENSION_PERMANENT_DELEGATE, HOOK_PROGRAM)
+    )
+    info = MintInfo.from_account_data("mint", TOKEN_2022_PROGRAM_ID, data)
+    assert info.close_authority == b58encode(EXTENSION_AUTHORITY)
+    assert info.permanent_delegate == b58encode(HOOK_PROGRAM)
+    assert info.extension_types == [EXTENSION_MINT_CLOSE_AUTHORITY, EXTENSION_PERMANENT_DELEGATE]
+
+def test_renounced_extension_authority_decodes_as_none():
+    data = token_2022_mint(tlv(EXTENSION_PERMANENT_DELEGATE, bytes(32)))
+    info = MintInfo.from_account_data("mint", TOKEN_2022_PROGRAM_ID, data)
+    assert info.permanent_delegate is None
+    assert assess_mint(info) == []
+
+def test_default_account_state():
+    frozen = MintInfo.from_account_data("mint", TOKEN_2022_PROGRAM_ID, token_2022_mint(tlv(EXTENSION_DEFAULT_ACCOUNT_STATE, bytes([2]))))
+    initialized = MintInfo.from_account_data("mint", TOKEN_2022_PROGRAM_ID, token_2022_mint(tlv(EXTENSION_DEFAULT_ACCOUNT_STATE, bytes([1]))))
+    assert frozen.default_frozen
+    assert not initialized.default_frozen
+
+def test_risks_name_the_token_program():
+    classic = MintInfo.from_account_data("usdc", TOKEN_PROGRAM_ID, base_mint(FREEZE_AUTHORITY))
+    hooked = MintInfo.from_account_data(
+        "hooked", TOKEN_2022_PROGRAM_ID,
+        token_2022_mint(tlv(EXTENSION_TRANSFER_HOOK, EXTENSION_AUTHORITY + HOOK_PROGRAM))
+    )
+    assert [(r["pattern"], r["program"]) for r in assess_mint(classic)] == [("freeze_authority", "SPL Token")]
+    assert [(r["pattern"], r["program"]) for r in assess_mint(hooked)] == [("transfer_hook", "Token-2022")]
+
+def test_quote_stablecoin_freeze_authority_is_not_a_risk():
+    usdc = MintInfo.from_account_data(USDC_MINT, TOKEN_PROGRAM_ID, base_mint(FREEZE_AUTHORITY))
+    assert assess_mint(usdc) == []
+
+def test_pool_mint_risks_are_reported_once_until_the_mint_changes(monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_INTERVAL", "0")
+    from scanner import VulnerabilityScanner
+    from test_adaptive_polling import pool_account
+    from pool_state import PoolState
+
+    scanner = VulnerabilityScanner()
+    pool = PoolState.from_account_data(pool_account())
+    pools = {"pool-a": pool, "pool-b": pool}
+    mints = {pool.token_0_mint: base_mint(FREEZE_AUTHORITY), pool.token_1_mint: base_mint()}
+
+    async def fetch(addresses):
+        return {address: mints[address] for address in addresses}
+
+    scanner._fetch_multiple_accounts = fetch
+    first = asyncio.run(scanner.scan_pool_mints(pools))
+    assert sorted(v.contract_address for v in first) == ["pool-a", "pool-b"]
+    assert asyncio.run(scanner.scan_pool_mints(pools)) == []
+
+    mints[pool.token_0_mint] = base_mint(FREEZE_AUTHORITY, supply=2_000_000)
+    changed = asyncio.run(scanner.scan_pool_mints(pools))
+    # Same issue, same id: a changed mint re-reports rather than minting new findings
+    assert sorted(v.id for v in changed) == sorted(v.id for v in first)
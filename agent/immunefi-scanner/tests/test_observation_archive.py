@@ -0,0 +1,36 @@
+import os
+
+from observation_archive import ObservationArchive
+from pool_state import Observation, Q32
+
+def observations(start, count, step=15, price=2):
+    return [
+        Observation(block_timestamp=start + i * step, cumulative_token_0_price_x32=(start + i * step) * price * Q32,
+                    cumulative_token_1_price_x32=(start + i * step) * Q32 // price)
+        for i in range(count)
+    ]
+
+def open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+def test_append_dedupes_and_reads_back(tmp_path):
+    archive = ObservationArchive(tmp_path)
+    assert archive.append("pool", observations(1000, 10)) == 10
+    assert archive.append("pool", observations(1000, 12)) == 2
+    assert archive.last_timestamp("pool") == 1000 + 11 * 15
+    twap = archive.twap("pool")
+    assert twap["samples"] == 12
+    assert twap["token_0_price"] == 2
+
+    # A fresh archive over the same files picks up where the last one stopped
+    reopened = ObservationArchive(tmp_path)
+    assert reopened.last_timestamp("pool") == 1000 + 11 * 15
+    assert len(reopened.range("pool", 1000 + 5 * 15)["cum_0_lo"]) == 7
+
+def test_many_pools_hold_no_descriptors(tmp_path):
+    archive = ObservationArchive(tmp_path)
+    before = open_fds()
+    for i in range(200):
+        archive.append(f"pool-{i}", observations(1000, 3))
+        archive.twap_series(f"pool-{i}")
+    assert open_fds() <= before + 1
@@ -0,0 +1,60 @@
+import numpy as np
+
+from price_graph import PAIR_MASK, PAIR_SHIFT, PriceGraph
+
+def outliers(graph):
+    return {o.pool_id: o for o in graph.evaluate()}
+
+def parallel_market(manipulated_price):
+    graph = PriceGraph()
+    graph.update_pool("honest", "A", "B", 1_000_000, 2_000_000)
+    graph.update_pool("manipulated", "A", "B", 100_000, 100_000 * manipulated_price)
+    graph.update_pool("a-c", "A", "C", 500_000, 500_000)
+    graph.update_pool("c-b", "C", "B", 500_000, 1_000_000)
+    return graph
+
+def test_manipulated_parallel_pool_does_not_drag_its_neighbours():
+    for price in (3, 20):
+        found = outliers(parallel_market(price))
+        assert set(found) == {"manipulated"}
+        assert np.isclose(found["manipulated"].consensus_price, 2)
+
+def test_triangle_blames_the_manipulated_pool():
+    # SOL = 100 USDC and X = 1 USDC; X was dumped into the X/SOL pool, halving its price
+    graph = PriceGraph()
+    graph.update_pool("sol-usdc", "SOL", "USDC", 1_000, 100_000)
+    graph.update_pool("x-usdc", "X", "USDC", 1_000_000, 1_000_000)
+    graph.update_pool("x-sol", "X", "SOL", 141_421, 707)
+    found = outliers(graph)
+    assert set(found) == {"x-sol"}
+    assert np.isclose(found["x-sol"].deviation, 1.0, atol=0.01)
+
+    # Once arbitraged back, the pool is cleared and rejoins the consensus
+    graph.update_pool("x-sol", "X", "SOL", 100_000, 1_000)
+    assert outliers(graph) == {}
+
+def pair_sums(graph):
+    keys, weight, weighted_logp = graph.pair_table()
+    return {
+        (graph.mints[k >> PAIR_SHIFT], graph.mints[k & PAIR_MASK]): (w, wl)
+        for k, w, wl in zip(keys.tolist(), weight.tolist(), weighted_logp.tolist())
+    }
+
+def test_pair_sums_follow_updates_and_removals():
+    graph = parallel_market(20)
+    graph.evaluate()
+    graph.update_pool("a-c", "A", "C", 700_000, 700_000)
+    graph.remove_pool("c-b")
+    graph.update_pool("c-b", "C", "B", 300_000, 600_000)
+    graph.evaluate()
+
+    # Same pools built from scratch, minus the excluded outlier
+    rebuilt = PriceGraph()
+    rebuilt.update_pool("honest", "A", "B", 1_000_000, 2_000_000)
+    rebuilt.update_pool("a-c", "A", "C", 700_000, 700_000)
+    rebuilt.update_pool("c-b", "C", "B", 300_000, 600_000)
+    expected = pair_sums(rebuilt)
+    actual = pair_sums(graph)
+    assert actual.keys() == expected.keys()
+    for pair, sums in expected.items():
+        assert np.allclose(actual[pair], sums)
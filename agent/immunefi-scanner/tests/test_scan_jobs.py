@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from scan_jobs import JobStatus, QuotaExceededError, ScanJobQueue
+
+class Recorder:
+    def __init__(self):
+        self.scanned = []
+        self.release = asyncio.Event()
+
+    async def scan(self, address):
+        self.scanned.append(address)
+        await self.release.wait()
+        return []
+
+async def drain(queue, jobs):
+    while any(job.is_active for job in jobs):
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+def test_duplicate_submissions_share_one_job():
+    async def run():
+        recorder = Recorder()
+        queue = ScanJobQueue(recorder.scan, max_workers=2)
+        first = queue.submit("addr", "client-a")
+        second = queue.submit("addr", "client-b")
+        assert first is second
+        assert first.client_ids == ["client-a", "client-b"]
+        queue.start()
+        recorder.release.set()
+        await drain(queue, [first])
+        assert recorder.scanned == ["addr"]
+        assert first.status == JobStatus.COMPLETED
+    asyncio.run(run())
+
+def test_quota_counts_only_submitted_jobs():
+    async def run():
+        recorder = Recorder()
+        queue = ScanJobQueue(recorder.scan, max_workers=1, client_quota=2)
+        jobs = [queue.submit("a", "client"), queue.submit("b", "client")]
+        with pytest.raises(QuotaExceededError):
+            queue.submit("c", "client")
+        # Joining another client's job is free
+        queue.submit("x", "other")
+        jobs.append(queue.submit("x", "client"))
+        queue.start()
+        recorder.release.set()
+        await drain(queue, jobs)
+        assert queue.submit("c", "client").status == JobStatus.QUEUED
+    asyncio.run(run())
+
+def test_lower_priority_value_runs_first_and_joins_raise_priority():
+    async def run():
+        recorder = Recorder()
+        recorder.release.set()
+        queue = ScanJobQueue(recorder.scan, max_workers=1)
+        jobs = [
+            queue.submit("low", "client", priority=8),
+            queue.submit("mid", "client", priority=5),
+            queue.submit("clamped", "client", priority=-3),
+            queue.submit("raised", "client", priority=9),
+        ]
+        assert jobs[2].priority == 0
+        assert queue.submit("raised", "other", priority=1).priority == 1
+        queue.start()
+        await drain(queue, jobs)
+        assert recorder.scanned == ["clamped", "raised", "mid", "low"]
+    asyncio.run(run())
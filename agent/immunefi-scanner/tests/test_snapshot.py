@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from scanner import SeverityLevel, Vulnerability, VulnerabilityScanner
+from snapshot import claim_snapshot_path, read_snapshot, write_snapshot
+
+def vulnerability(index, contract, title, when):
+    return Vulnerability(
+        id=f"id-{index}", title=title, description="d", severity=SeverityLevel.CRITICAL,
+        bounty_min=50000, bounty_max=60000, proof_of_concept="", fix_suggestion="",
+        discovered_at=when, contract_address=contract
+    )
+
+def make_scanner(monkeypatch, tmp_path):
+    monkeypatch.setenv("SNAPSHOT_PATH", str(tmp_path / "state.json.gz"))
+    return VulnerabilityScanner()
+
+def test_restore_keeps_every_finding(monkeypatch, tmp_path):
+    scanner = make_scanner(monkeypatch, tmp_path)
+    start = datetime.now() - timedelta(hours=2)
+    for cycle in range(50):
+        scanner.record_findings([
+            vulnerability(f"a{cycle}", "pool-a", "Oracle", start + timedelta(minutes=cycle)),
+            vulnerability(f"b{cycle}", "pool-b", "Oracle", start + timedelta(minutes=cycle)),
+        ])
+    write_snapshot(scanner.snapshot_path, scanner.snapshot_state())
+    restored = make_scanner(monkeypatch, tmp_path)
+    assert restored.restore_state(read_snapshot(restored.snapshot_path))
+    assert [v.id for v in restored.vulnerabilities] == [v.id for v in scanner.vulnerabilities]
+    assert restored.status_snapshot()["total_vulnerabilities"] == 100
+    assert restored.stats.totals() == scanner.stats.totals()
+    assert restored.stats.timeseries("minute", 180) == scanner.stats.timeseries("minute", 180)
+
+def test_snapshot_does_not_share_live_containers(monkeypatch, tmp_path):
+    scanner = make_scanner(monkeypatch, tmp_path)
+    scanner.pool_vaults["pool-a"] = (1, 2)
+    state = scanner.snapshot_state()
+    scanner.pool_vaults["pool-b"] = (3, 4)
+    assert list(state["pool_vaults"]) == ["pool-a"]
+
+def test_sharded_workers_get_their_own_snapshot(monkeypatch):
+    monkeypatch.setenv("WORKER_ID", "worker-2")
+    assert VulnerabilityScanner._snapshot_stem() == "scanner-worker-2"
+    monkeypatch.delenv("WORKER_ID")
+    assert VulnerabilityScanner._snapshot_stem() == "scanner"
+
+def test_each_process_claims_its_own_snapshot_slot(tmp_path):
+    # flock conflicts between open files even within one process, standing in for two workers
+    first = claim_snapshot_path(tmp_path, "scanner")
+    second = claim_snapshot_path(tmp_path, "scanner")
+    assert first.name == "scanner.json.gz"
+    assert second.name == "scanner-1.json.gz"
+
+def test_damaged_snapshot_starts_cold(monkeypatch, tmp_path):
+    scanner = make_scanner(monkeypatch, tmp_path)
+    state = scanner.snapshot_state()
+    state["findings"] = [{"severity": "Nonsense"}]
+    write_snapshot(scanner.snapshot_path, state)
+    assert not scanner.restore_state(read_snapshot(scanner.snapshot_path))
+    assert scanner.vulnerabilities == []
+
+def test_entering_the_scanner_restores_its_snapshot(monkeypatch, tmp_path):
+    scanner = make_scanner(monkeypatch, tmp_path)
+    scanner.record_findings([vulnerability(0, "pool-a", "Oracle", datetime.now())])
+    write_snapshot(scanner.snapshot_path, scanner.snapshot_state())
+
+    async def start():
+        restored = make_scanner(monkeypatch, tmp_path)
+        await restored.__aenter__()
+        try:
+            return [v.id for v in restored.vulnerabilities]
+        finally:
+            await restored.session.close()
+            if restored.alerts:
+                await restored.alerts.stop()
+    assert asyncio.run(start()) == ["id-0"]
+
+def test_save_snapshot_writes_atomically(monkeypatch, tmp_path):
+    scanner = make_scanner(monkeypatch, tmp_path)
+    asyncio.run(scanner.save_snapshot())
+    assert read_snapshot(scanner.snapshot_path)["scan_count"] == 0
+    assert not list(tmp_path.glob("*.tmp"))